@@ -1,21 +1,21 @@
 import jwt
 import uuid
+import hashlib
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update, insert, literal, false, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
 from models import User, RefreshToken
+from hashing import verify_password, get_password_hash
+from common.metrics import timed
+from common.admin import AdminProbe
 from database import get_db
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+def hash_token(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
 
 def create_access_token(data: dict, expires_delta: int = ACCESS_TOKEN_EXPIRE_MINUTES * 60):
     to_encode = data.copy()
@@ -25,7 +25,8 @@ def create_access_token(data: dict, expires_delta: int = ACCESS_TOKEN_EXPIRE_MIN
         "iat": int(datetime.now(timezone.utc).timestamp()),
         "jti": str(uuid.uuid4())
     })
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with timed("jwt_encode"):
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def create_refresh_token(data: dict, expires_delta: int = REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600):
     to_encode = data.copy()
@@ -35,11 +36,13 @@ def create_refresh_token(data: dict, expires_delta: int = REFRESH_TOKEN_EXPIRE_D
         "iat": int(datetime.now(timezone.utc).timestamp()),
         "jti": str(uuid.uuid4())
     })
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with timed("jwt_encode"):
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with timed("jwt_decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -49,27 +52,74 @@ def decode_token(token: str):
 async def authenticate_user(db: AsyncSession, username: str, password: str):
     result = await db.execute(select(User).where(User.username == username))
     user = result.scalars().first()
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await verify_password(password, user.password_hash):
         return None
     return user
 
+admin_probe = AdminProbe(User)
+
+async def create_user(db: AsyncSession, username: str, password_hash: str, role: str, email: str = None):
+    # INSERT ... ON CONFLICT DO NOTHING RETURNING: одна команда и проверяет уникальность username,
+    # и возвращает созданную строку; None — имя уже занято
+    stmt = (
+        pg_insert(User)
+        .values(username=username, password_hash=password_hash, role=role, email=email)
+        .on_conflict_do_nothing(index_elements=["username"])
+        .returning(User)
+    )
+    result = await db.execute(stmt)
+    user = result.scalars().first()
+    await db.commit()
+    if user is not None:
+        admin_probe.mark(user.role)
+    return user
+
 async def save_refresh_token(db: AsyncSession, user_id: int, token: str, expires_at: datetime):
-    refresh_token = RefreshToken(user_id=user_id, token=token, expires_at=expires_at)
+    refresh_token = RefreshToken(user_id=user_id, token_hash=hash_token(token), expires_at=expires_at)
     db.add(refresh_token)
     await db.commit()
 
 async def revoke_refresh_token(db: AsyncSession, token: str):
-    result = await db.execute(select(RefreshToken).where(RefreshToken.token == token))
+    result = await db.execute(select(RefreshToken).where(RefreshToken.token_hash == hash_token(token)))
     refresh = result.scalars().first()
     if refresh:
         refresh.revoked = True
         await db.commit()
 
 async def is_refresh_token_valid(db: AsyncSession, token: str):
-    result = await db.execute(select(RefreshToken).where(RefreshToken.token == token, RefreshToken.revoked == False))
+    result = await db.execute(select(RefreshToken).where(RefreshToken.token_hash == hash_token(token), RefreshToken.revoked == False))
     refresh = result.scalars().first()
     if not refresh:
         return False
     if refresh.expires_at < datetime.now(timezone.utc):
         return False
     return True
+
+async def rotate_refresh_token(db: AsyncSession, old_token: str, new_token: str, expires_at: datetime) -> bool:
+    # Один statement: условный UPDATE отзывает старый токен (только если он ещё действителен),
+    # а INSERT из его RETURNING сохраняет новый. Параллельный refresh тем же токеном
+    # после блокировки строки увидит revoked = true и ничего не вставит.
+    rotated = (
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == hash_token(old_token),
+            RefreshToken.revoked == False,
+            RefreshToken.expires_at > func.now(),
+        )
+        .values(revoked=True)
+        .returning(RefreshToken.user_id)
+        .cte("rotated")
+    )
+    stmt = (
+        insert(RefreshToken)
+        .from_select(
+            ["user_id", "token_hash", "expires_at", "revoked"],
+            select(rotated.c.user_id, literal(hash_token(new_token)), literal(expires_at), false()),
+        )
+        .add_cte(rotated)
+        .returning(RefreshToken.id)
+    )
+    result = await db.execute(stmt)
+    new_id = result.scalar_one_or_none()
+    await db.commit()
+    return new_id is not None
@@ -1,11 +1,16 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from auth import decode_token
+from database import AsyncSessionLocal
+from common.revocation import RevocationList
 from models import User
 from database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+# Отозванные access-токены: фильтр в памяти, в БД идём только при попадании
+revocation = RevocationList(AsyncSessionLocal)
+
 class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super(JWTBearer, self).__init__(auto_error=auto_error)
@@ -14,6 +19,7 @@ class JWTBearer(HTTPBearer):
         credentials: HTTPAuthorizationCredentials = await super(JWTBearer, self).__call__(request)
         if credentials:
             payload = decode_token(credentials.credentials)
+            await revocation.check(payload)
             request.state.user = payload
             return payload
         else:
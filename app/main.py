@@ -1,30 +1,46 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from fastapi.responses import RedirectResponse
-from database import get_db
+from fastapi import Query, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from typing import Optional
+from database import get_db, database
 from models import User
 from schemas import UserCreate, UserOut, Token, TokenRefresh
 from auth import (
-    authenticate_user, get_password_hash, create_access_token, create_refresh_token,
-    save_refresh_token, is_refresh_token_valid, revoke_refresh_token, decode_token
+    authenticate_user, get_password_hash, create_access_token, create_refresh_token, create_user,
+    save_refresh_token, rotate_refresh_token, decode_token
 )
-from dependencies import get_current_user, role_required, roles_required
-from vk_oauth import get_vk_auth_url, exchange_code_for_token, get_vk_user_info
+from dependencies import get_current_user, role_required, roles_required, revocation
+from vk_oauth import get_vk_auth_url, exchange_code_for_token, get_vk_user_info, start_vk_client, stop_vk_client
+from hashing import start_hashing_pool, stop_hashing_pool, hashing_stats
+from common.metrics import setup_metrics, register_stats
+from pagination import keyset_page, out_columns, fetch_rows, encode_page, json_page, stream_ndjson
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_hashing_pool()
+    await start_vk_client()
+    await revocation.start()
+    yield
+    await revocation.stop()
+    await stop_vk_client()
+    stop_hashing_pool()
+
+app = FastAPI(lifespan=lifespan)
+setup_metrics(app, "app", database)
+register_stats("password_hashing", hashing_stats)
+register_stats("revocation", revocation.stats)
 
 @app.post("/register", response_model=UserOut)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.username == user.username))
-    if result.scalars().first():
+    hashed_pw = await get_password_hash(user.password)
+    db_user = await create_user(db, user.username, hashed_pw, "user", user.email)
+    if db_user is None:
         raise HTTPException(status_code=400, detail="Username already exists")
-    hashed_pw = get_password_hash(user.password)
-    db_user = User(username=user.username, password_hash=hashed_pw, role="user", email=user.email)
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
     return db_user
 
 @app.post("/login", response_model=Token)
@@ -45,15 +61,12 @@ async def refresh_token(data: TokenRefresh, db: AsyncSession = Depends(get_db)):
         payload = decode_token(data.refresh_token)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
-    valid = await is_refresh_token_valid(db, data.refresh_token)
-    if not valid:
-        raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
     access_payload = {"sub": payload["sub"], "role": payload["role"]}
     access_token = create_access_token(access_payload)
     refresh_token = create_refresh_token(access_payload, expires_delta=60*60*24*7)
     expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-    await save_refresh_token(db, payload["sub"], refresh_token, expires_at)
-    await revoke_refresh_token(db, data.refresh_token)
+    if not await rotate_refresh_token(db, data.refresh_token, refresh_token, expires_at):
+        raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
     return Token(access_token=access_token, refresh_token=refresh_token)
 
 @app.get("/users/me", response_model=UserOut)
@@ -64,10 +77,25 @@ async def read_me(payload=Depends(get_current_user), db: AsyncSession = Depends(
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+# колонки выдачи списка: ровно поля UserOut, хеш пароля и прочее в запрос не попадают
+USER_COLUMNS = out_columns(User, UserOut)
+
 @app.get("/users", response_model=list[UserOut], dependencies=[Depends(role_required("admin"))])
-async def get_users(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User))
-    return result.scalars().all()
+async def get_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[int] = Query(None, description="id последнего пользователя предыдущей страницы (X-Next-Cursor)"),
+    stream: bool = Query(False, description="отдать всех пользователей потоком NDJSON"),
+    db: AsyncSession = Depends(get_db),
+):
+    if stream:
+        query = select(*USER_COLUMNS).order_by(User.id)
+        if after is not None:
+            query = query.where(User.id > after)
+        return StreamingResponse(stream_ndjson(query), media_type="application/x-ndjson")
+    rows = await fetch_rows(db, keyset_page(select(*USER_COLUMNS), User.id, after, limit))
+    return json_page(request, response, encode_page(rows, limit), limit)
 
 @app.get("/auth/vk")
 def auth_vk():
@@ -78,11 +106,11 @@ async def vk_callback(request: Request, db: AsyncSession = Depends(get_db)):
     code = request.query_params.get("code")
     if not code:
         raise HTTPException(status_code=400, detail="Code not provided")
-    token_data = exchange_code_for_token(code)
+    token_data = await exchange_code_for_token(code)
     vk_user_id = token_data["user_id"]
     email = token_data.get("email")
     access_token_vk = token_data["access_token"]
-    user_info = get_vk_user_info(access_token_vk, vk_user_id)
+    user_info = await get_vk_user_info(access_token_vk, vk_user_id)
     first_name = user_info["response"][0]["first_name"]
     last_name = user_info["response"][0]["last_name"]
     # Поиск или создание пользователя
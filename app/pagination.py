@@ -0,0 +1,51 @@
+import orjson
+from fastapi import Request, Response
+from database import AsyncSessionLocal
+from config import STREAM_BATCH_SIZE
+
+def keyset_page(query, id_column, after, limit: int):
+    # keyset по id: страница начинается строго после последнего id предыдущей,
+    # поэтому глубина страницы не влияет на стоимость запроса (в отличие от OFFSET)
+    query = query.order_by(id_column).limit(limit)
+    if after is not None:
+        query = query.where(id_column > after)
+    return query
+
+def out_columns(model, schema):
+    # Только поля схемы выдачи: строки приходят кортежами, без ORM-объектов и лишних колонок
+    return [getattr(model, name) for name in schema.model_fields]
+
+async def fetch_rows(db, query) -> list[dict]:
+    result = await db.execute(query)
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+def encode_page(rows: list[dict], limit: int):
+    # Строки из БД уже в форме схемы: pydantic-валидацию по строке пропускаем, кодирует orjson.
+    # Полная страница — возможно, есть следующая: курсор = id последней строки
+    cursor = rows[-1]["id"] if len(rows) >= limit else None
+    return orjson.dumps(rows), cursor
+
+def set_next_cursor(request: Request, response: Response, cursor, limit: int):
+    if cursor is None:
+        return
+    response.headers["X-Next-Cursor"] = str(cursor)
+    next_url = request.url.include_query_params(after=cursor, limit=limit)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+
+def json_page(request: Request, response: Response, page, limit: int) -> Response:
+    body, cursor = page
+    out = Response(body, media_type="application/json")
+    # готовый Response FastAPI отдаёт как есть: заголовки, выставленные зависимостями, переносим сами
+    out.headers.raw.extend(response.headers.raw)
+    set_next_cursor(request, out, cursor, limit)
+    return out
+
+async def stream_ndjson(query):
+    # Своя сессия: сессия из get_db закрывается раньше, чем отдаётся тело StreamingResponse.
+    # stream() читает через серверный курсор пачками по STREAM_BATCH_SIZE, память не растёт с размером таблицы
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        keys = list(result.keys())
+        async for partition in result.partitions():
+            yield b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in partition)
@@ -19,3 +19,21 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 VK_CLIENT_ID = os.getenv("VK_CLIENT_ID", "51621714")
 VK_CLIENT_SECRET = os.getenv("VK_CLIENT_SECRET", "unqRbLFtmgfSsRKaw0Iz")
 VK_REDIRECT_URI = os.getenv("VK_REDIRECT_URI", "https://localhost/auth/vk/callback")
+
+# Пул процессов для bcrypt (хеширование и проверка паролей); ядра делятся между процессами uvicorn
+PWD_HASH_WORKERS = int(os.getenv("PWD_HASH_WORKERS", max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", "1")))))
+PWD_HASH_MAX_PENDING = int(os.getenv("PWD_HASH_MAX_PENDING", "64"))
+
+# HTTP-клиент к VK
+VK_OAUTH_URL = os.getenv("VK_OAUTH_URL", "https://oauth.vk.com")
+VK_API_URL = os.getenv("VK_API_URL", "https://api.vk.com")
+VK_HTTP_TIMEOUT = float(os.getenv("VK_HTTP_TIMEOUT", "5"))
+VK_HTTP_RETRIES = int(os.getenv("VK_HTTP_RETRIES", "2"))
+VK_HTTP_BACKOFF = float(os.getenv("VK_HTTP_BACKOFF", "0.2"))
+VK_HTTP_MAX_CONNECTIONS = int(os.getenv("VK_HTTP_MAX_CONNECTIONS", "20"))
+VK_HTTP_MAX_KEEPALIVE = int(os.getenv("VK_HTTP_MAX_KEEPALIVE", "10"))
+
+# Фоновая очистка refresh_tokens от истёкших и отозванных строк: размер пачки DELETE и пауза между
+# проходами; 0 в любом из двух параметров выключает очистку
+REFRESH_TOKEN_PURGE_BATCH_SIZE = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH_SIZE", "1000"))
+REFRESH_TOKEN_PURGE_INTERVAL_SECONDS = float(os.getenv("REFRESH_TOKEN_PURGE_INTERVAL_SECONDS", "300"))
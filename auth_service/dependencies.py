@@ -1,6 +1,11 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from auth import decode_token
+from database import AsyncSessionLocal
+from common.revocation import RevocationList
+
+# Отозванные access-токены: фильтр в памяти, в БД идём только при попадании
+revocation = RevocationList(AsyncSessionLocal)
 
 class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
@@ -10,6 +15,7 @@ class JWTBearer(HTTPBearer):
         credentials: HTTPAuthorizationCredentials = await super(JWTBearer, self).__call__(request)
         if credentials:
             payload = decode_token(credentials.credentials)
+            await revocation.check(payload)
             request.state.user = payload
             return payload
         else:
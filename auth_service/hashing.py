@@ -0,0 +1,83 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from config import PWD_HASH_WORKERS, PWD_HASH_MAX_PENDING
+from common.metrics import observe_operation
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt нагружает CPU и частично держит GIL, поэтому считаем его в отдельных процессах,
+# а event loop только ждёт результат
+_executor = None
+_pending = 0
+_stats = {
+    "verify": {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+    "hash": {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+    "rejected": 0,
+}
+
+def _verify(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _hash(password):
+    return pwd_context.hash(password)
+
+def _warmup():
+    return None
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PWD_HASH_WORKERS)
+    return _executor
+
+def start_hashing_pool():
+    executor = _get_executor()
+    # прогреваем воркеры, чтобы первый логин не платил за запуск процессов
+    for _ in range(PWD_HASH_WORKERS):
+        executor.submit(_warmup)
+
+def stop_hashing_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+async def _run(op: str, fn, *args):
+    global _pending
+    if _pending >= PWD_HASH_MAX_PENDING:
+        _stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Too many authentication requests, try again later")
+    _pending += 1
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+        elapsed = time.perf_counter() - start
+        op_stats = _stats[op]
+        op_stats["calls"] += 1
+        op_stats["total_seconds"] += elapsed
+        op_stats["max_seconds"] = max(op_stats["max_seconds"], elapsed)
+        observe_operation(f"password_{op}", elapsed)
+
+async def verify_password(plain_password, hashed_password):
+    if not hashed_password:
+        return False
+    return await _run("verify", _verify, plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await _run("hash", _hash, password)
+
+def hashing_stats():
+    return {
+        "workers": PWD_HASH_WORKERS,
+        "max_pending": PWD_HASH_MAX_PENDING,
+        "pending": _pending,
+        "rejected": _stats["rejected"],
+        "verify": dict(_stats["verify"]),
+        "hash": dict(_stats["hash"]),
+    }
@@ -2,18 +2,40 @@ from fastapi import FastAPI, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi.responses import RedirectResponse
-from database import get_db
+from database import get_db, database
 from models import User
 from schemas import UserCreate, UserOut, Token, TokenRefresh
 from auth import (
     authenticate_user, get_password_hash, create_access_token, create_refresh_token,
-    save_refresh_token, is_refresh_token_valid, revoke_refresh_token, decode_token
+    admin_probe, create_user,
+    save_refresh_token, rotate_refresh_token, revoke_refresh_token, decode_token
 )
-from dependencies import get_current_user, role_required
-from vk_oauth import get_vk_auth_url, exchange_code_for_token, get_vk_user_info
+from dependencies import get_current_user, role_required, revocation
+from vk_oauth import get_vk_auth_url, exchange_code_for_token, get_vk_user_info, start_vk_client, stop_vk_client
+from hashing import start_hashing_pool, stop_hashing_pool, hashing_stats
+from retention import start_retention, stop_retention, retention_stats
+from common.metrics import setup_metrics, register_stats
 from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+from typing import Optional
 
-app = FastAPI(title="Auth Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_hashing_pool()
+    await start_vk_client()
+    start_retention()
+    await revocation.start()
+    yield
+    await revocation.stop()
+    await stop_retention()
+    await stop_vk_client()
+    stop_hashing_pool()
+
+app = FastAPI(title="Auth Service", lifespan=lifespan)
+setup_metrics(app, "auth", database)
+register_stats("password_hashing", hashing_stats)
+register_stats("refresh_token_retention", retention_stats)
+register_stats("revocation", revocation.stats)
 
 @app.get("/")
 def root():
@@ -21,17 +43,12 @@ def root():
 
 @app.post("/register", response_model=UserOut)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
-    # Проверяем, есть ли уже admin
-    result = await db.execute(select(User).where(User.role == "admin"))
-    admin_exists = result.scalars().first() is not None
-    result = await db.execute(select(User).where(User.username == user.username))
-    if result.scalars().first():
+    # Первый зарегистрированный пользователь становится admin
+    role = "user" if await admin_probe.exists(db) else "admin"
+    hashed_pw = await get_password_hash(user.password)
+    db_user = await create_user(db, user.username, hashed_pw, role, user.email)
+    if db_user is None:
         raise HTTPException(status_code=400, detail="Username already exists")
-    hashed_pw = get_password_hash(user.password)
-    db_user = User(username=user.username, password_hash=hashed_pw, role="user" if admin_exists else "admin", email=user.email)
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
     return db_user
 
 @app.post("/login", response_model=Token)
@@ -52,17 +69,24 @@ async def refresh_token(data: TokenRefresh, db: AsyncSession = Depends(get_db)):
         payload = decode_token(data.refresh_token)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
-    valid = await is_refresh_token_valid(db, data.refresh_token)
-    if not valid:
-        raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
     access_payload = {"sub": payload["sub"], "role": payload["role"]}
     access_token = create_access_token(access_payload)
     refresh_token = create_refresh_token(access_payload, expires_delta=60*60*24*7)
     expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-    await save_refresh_token(db, int(payload["sub"]), refresh_token, expires_at)
-    await revoke_refresh_token(db, data.refresh_token)
+    if not await rotate_refresh_token(db, data.refresh_token, refresh_token, expires_at):
+        raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
     return Token(access_token=access_token, refresh_token=refresh_token)
 
+@app.post("/token/revoke")
+async def revoke_token(data: Optional[TokenRefresh] = None, payload=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # Отзывает access-токен из заголовка; заодно можно отозвать и парный refresh-токен
+    if "jti" not in payload:
+        raise HTTPException(status_code=400, detail="Token has no jti")
+    await revocation.revoke(db, payload["jti"], payload["exp"], int(payload["sub"]))
+    if data is not None:
+        await revoke_refresh_token(db, data.refresh_token)
+    return {"detail": "Token revoked"}
+
 @app.get("/auth/vk")
 def auth_vk():
     return RedirectResponse(get_vk_auth_url())
@@ -72,11 +96,11 @@ async def vk_callback(request: Request, db: AsyncSession = Depends(get_db)):
     code = request.query_params.get("code")
     if not code:
         raise HTTPException(status_code=400, detail="Code not provided")
-    token_data = exchange_code_for_token(code)
+    token_data = await exchange_code_for_token(code)
     vk_user_id = token_data["user_id"]
     email = token_data.get("email")
     access_token_vk = token_data["access_token"]
-    user_info = get_vk_user_info(access_token_vk, vk_user_id)
+    user_info = await get_vk_user_info(access_token_vk, vk_user_id)
     first_name = user_info["response"][0]["first_name"]
     last_name = user_info["response"][0]["last_name"]
     # Поиск или создание пользователя
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from sqlalchemy import delete, or_, func
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from models import RefreshToken
+from config import REFRESH_TOKEN_PURGE_BATCH_SIZE, REFRESH_TOKEN_PURGE_INTERVAL_SECONDS
+from common.revocation import revoked_tokens
+
+logger = logging.getLogger(__name__)
+
+_task = None
+_stats = {
+    "runs": 0,
+    "errors": 0,
+    "rows_purged_total": 0,
+    "last_run_rows": 0,
+    "last_run_seconds": 0.0,
+}
+
+async def purge_refresh_tokens_batch(db: AsyncSession, batch_size: int) -> int:
+    # Небольшими пачками, чтобы блокировки и транзакции были короткими;
+    # SKIP LOCKED не даёт нескольким воркерам мешать друг другу и запросам /token/refresh
+    victims = (
+        select(RefreshToken.id)
+        .where(or_(RefreshToken.revoked == True, RefreshToken.expires_at < func.now()))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(victims.scalar_subquery())))
+    await db.commit()
+    return result.rowcount
+
+async def purge_revoked_tokens_batch(db: AsyncSession, batch_size: int) -> int:
+    # истёкший access-токен и так не пройдёт проверку подписи, запись об отзыве больше не нужна
+    victims = (
+        select(revoked_tokens.c.id)
+        .where(revoked_tokens.c.expires_at < func.now())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(delete(revoked_tokens).where(revoked_tokens.c.id.in_(victims.scalar_subquery())))
+    await db.commit()
+    return result.rowcount
+
+async def _purge(purge_batch, batch_size: int) -> int:
+    # LIMIT 0 ничего не удаляет, и цикл ниже никогда бы не закончился
+    if batch_size < 1:
+        return 0
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            deleted = await purge_batch(db, batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+        # отдаём event loop обычным запросам между пачками
+        await asyncio.sleep(0)
+
+async def purge_refresh_tokens(batch_size: int = REFRESH_TOKEN_PURGE_BATCH_SIZE) -> int:
+    return await _purge(purge_refresh_tokens_batch, batch_size)
+
+async def purge_revoked_tokens(batch_size: int = REFRESH_TOKEN_PURGE_BATCH_SIZE) -> int:
+    return await _purge(purge_revoked_tokens_batch, batch_size)
+
+async def _purge_loop():
+    while True:
+        start = time.perf_counter()
+        try:
+            rows = await purge_refresh_tokens() + await purge_revoked_tokens()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            _stats["errors"] += 1
+            logger.exception("Refresh token purge failed")
+        else:
+            _stats["runs"] += 1
+            _stats["rows_purged_total"] += rows
+            _stats["last_run_rows"] = rows
+            _stats["last_run_seconds"] = time.perf_counter() - start
+        await asyncio.sleep(REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
+
+def start_retention():
+    global _task
+    if REFRESH_TOKEN_PURGE_INTERVAL_SECONDS > 0 and REFRESH_TOKEN_PURGE_BATCH_SIZE > 0 and _task is None:
+        _task = asyncio.create_task(_purge_loop())
+
+async def stop_retention():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+def retention_stats():
+    return dict(_stats, batch_size=REFRESH_TOKEN_PURGE_BATCH_SIZE, interval_seconds=REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
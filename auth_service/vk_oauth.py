@@ -1,37 +1,77 @@
-import requests
+import asyncio
+import httpx
 from fastapi import HTTPException
-from config import VK_CLIENT_ID, VK_CLIENT_SECRET, VK_REDIRECT_URI
+from config import (
+    VK_CLIENT_ID, VK_CLIENT_SECRET, VK_REDIRECT_URI, VK_OAUTH_URL, VK_API_URL,
+    VK_HTTP_TIMEOUT, VK_HTTP_RETRIES, VK_HTTP_BACKOFF, VK_HTTP_MAX_CONNECTIONS, VK_HTTP_MAX_KEEPALIVE
+)
+
+# Один клиент на процесс: keep-alive соединения к VK переиспользуются между запросами
+_client = None
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(VK_HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=VK_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=VK_HTTP_MAX_KEEPALIVE,
+            ),
+        )
+    return _client
+
+async def start_vk_client():
+    _get_client()
+
+async def stop_vk_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def _vk_get(url: str, params: dict, error_detail: str):
+    client = _get_client()
+    for attempt in range(VK_HTTP_RETRIES + 1):
+        last_attempt = attempt == VK_HTTP_RETRIES
+        try:
+            response = await client.get(url, params=params)
+        except httpx.TransportError:
+            if last_attempt:
+                raise HTTPException(status_code=502, detail="VK is unavailable")
+        else:
+            # повторяем только временные ошибки VK, 4xx сразу отдаём клиенту
+            if response.status_code < 500 and response.status_code != 429:
+                break
+            if last_attempt:
+                break
+        await asyncio.sleep(VK_HTTP_BACKOFF * (2 ** attempt))
+    if not response.is_success:
+        raise HTTPException(status_code=400, detail=error_detail)
+    return response.json()
 
 def get_vk_auth_url():
     return (
-        f"https://oauth.vk.com/authorize?"
+        f"{VK_OAUTH_URL}/authorize?"
         f"client_id={VK_CLIENT_ID}&"
         f"redirect_uri={VK_REDIRECT_URI}&"
         f"display=page&scope=email&response_type=code&v=5.131"
     )
 
-def exchange_code_for_token(code: str):
-    token_url = (
-        f"https://oauth.vk.com/access_token?"
-        f"client_id={VK_CLIENT_ID}&"
-        f"client_secret={VK_CLIENT_SECRET}&"
-        f"redirect_uri={VK_REDIRECT_URI}&"
-        f"code={code}"
-    )
-    response = requests.get(token_url)
-    print("VK TOKEN EXCHANGE URL:", token_url, flush=True)
-    print("VK TOKEN EXCHANGE RESPONSE:", response.status_code, response.text, flush=True)
-    if not response.ok:
-        raise HTTPException(status_code=400, detail="VK token exchange failed")
-    return response.json()
+async def exchange_code_for_token(code: str):
+    params = {
+        "client_id": VK_CLIENT_ID,
+        "client_secret": VK_CLIENT_SECRET,
+        "redirect_uri": VK_REDIRECT_URI,
+        "code": code,
+    }
+    return await _vk_get(f"{VK_OAUTH_URL}/access_token", params, "VK token exchange failed")
 
-def get_vk_user_info(access_token: str, user_id: str):
-    user_info_url = (
-        f"https://api.vk.com/method/users.get?"
-        f"user_ids={user_id}&fields=first_name,last_name,email&"
-        f"access_token={access_token}&v=5.131"
-    )
-    response = requests.get(user_info_url)
-    if not response.ok:
-        raise HTTPException(status_code=400, detail="VK user info fetch failed")
-    return response.json()
+async def get_vk_user_info(access_token: str, user_id: str):
+    params = {
+        "user_ids": user_id,
+        "fields": "first_name,last_name,email",
+        "access_token": access_token,
+        "v": "5.131",
+    }
+    return await _vk_get(f"{VK_API_URL}/method/users.get", params, "VK user info fetch failed")
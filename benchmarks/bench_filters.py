@@ -0,0 +1,297 @@
+"""
+QuotientFilter против set, Bloom filter на NumPy и простого cuckoo filter на одних и тех же
+потоках ключей: вставка и поиск (по одному и пачкой), байт на элемент и доля ложных
+срабатываний для каждой комбинации q, r и α.
+
+Фильтрам дан одинаковый бюджет: Bloom получает (r+3)·2^q бит, как упакованный quotient filter,
+cuckoo — 2^q слотов (корзины по 4) с r-битными отпечатками.
+
+    python benchmarks/bench_filters.py --q 12 16 --r 8 12 --alpha 0.25 0.5 0.75 0.9 \\
+        --out results/filters.json --plot results/filters
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from common.quotient_filter import QuotientFilter, _splitmix64, _splitmix64_int, hash64, hash64_many
+
+MASK32 = (1 << 32) - 1
+
+
+class SetFilter:
+    # точный ответ; память — сама таблица set плюс объекты int
+    def __init__(self, q, r):
+        self.items = set()
+
+    def add(self, x):
+        self.items.add(x)
+
+    def add_many(self, keys):
+        self.items.update(keys.tolist())
+
+    def __contains__(self, x):
+        return x in self.items
+
+    def contains_many(self, keys):
+        return np.fromiter((x in self.items for x in keys.tolist()), dtype=bool, count=len(keys))
+
+    @property
+    def nbytes(self):
+        return sys.getsizeof(self.items) + sum(sys.getsizeof(x) for x in self.items)
+
+
+class BloomFilter:
+    """k индексов двойным хешированием h1 + i·h2 по битовому массиву; k — оптимальное для n элементов."""
+
+    def __init__(self, q, r, n):
+        self.m = (r + 3) << q
+        self.k = max(1, round(self.m / max(n, 1) * math.log(2)))
+        # bytearray — быстрый доступ по одному биту, np.frombuffer поверх него — пачкой
+        self.raw = bytearray(-(-self.m // 8))
+        self.bits = np.frombuffer(self.raw, dtype=np.uint8)
+
+    def _indices(self, h):
+        h1, h2 = h & MASK32, (h >> 32) | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def add(self, x):
+        for i in self._indices(hash64(x)):
+            self.raw[i >> 3] |= 1 << (i & 7)
+
+    def __contains__(self, x):
+        return all(self.raw[i >> 3] >> (i & 7) & 1 for i in self._indices(hash64(x)))
+
+    def _indices_many(self, keys):
+        h = hash64_many(keys)
+        h1, h2 = h & np.uint64(MASK32), (h >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.k, dtype=np.uint64)
+        return (h1[:, None] + steps * h2[:, None]) % np.uint64(self.m)
+
+    def add_many(self, keys):
+        idx = self._indices_many(keys).ravel()
+        np.bitwise_or.at(self.bits, idx >> np.uint64(3), (1 << (idx & np.uint64(7))).astype(np.uint8))
+
+    def contains_many(self, keys):
+        idx = self._indices_many(keys)
+        return ((self.bits[idx >> np.uint64(3)] >> (idx & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+
+class CuckooFilter:
+    """Корзины по 4 отпечатка, partial-key cuckoo: вторая корзина = первая XOR hash(отпечатка)."""
+
+    BUCKET = 4
+    MAX_KICKS = 500
+
+    def __init__(self, q, r, seed=0):
+        self.n_buckets = max(1, (1 << q) // self.BUCKET)
+        self.fp_mask = (1 << r) - 1
+        dtype = np.uint8 if r <= 8 else np.uint16 if r <= 16 else np.uint32
+        self.table = np.zeros((self.n_buckets, self.BUCKET), dtype=dtype)
+        self.rows = self.table.tolist()          # копия для скалярных операций, nbytes считаем по table
+        self.rng = random.Random(seed)
+        self.failed = 0
+
+    def _place(self, h):
+        fp = (h >> 32) & self.fp_mask or 1   # 0 — пустой слот
+        return fp, h % self.n_buckets
+
+    def _alt(self, i, fp):
+        return (i ^ _splitmix64_int(fp)) % self.n_buckets
+
+    def add(self, x):
+        fp, i = self._place(hash64(x))
+        for b in (i, self._alt(i, fp)):
+            row = self.rows[b]
+            if 0 in row:
+                row[row.index(0)] = fp
+                self.table[b] = row
+                return True
+        # выселяем случайного соседа, пока не найдём место
+        b = self.rng.choice((i, self._alt(i, fp)))
+        for _ in range(self.MAX_KICKS):
+            row = self.rows[b]
+            j = self.rng.randrange(self.BUCKET)
+            fp, row[j] = row[j], fp
+            self.table[b] = row
+            b = self._alt(b, fp)
+            row = self.rows[b]
+            if 0 in row:
+                row[row.index(0)] = fp
+                self.table[b] = row
+                return True
+        self.failed += 1                         # фильтр переполнен: отпечаток потерян
+        return False
+
+    def add_many(self, keys):
+        for x in keys.tolist():
+            self.add(x)
+
+    def __contains__(self, x):
+        fp, i = self._place(hash64(x))
+        return fp in self.rows[i] or fp in self.rows[self._alt(i, fp)]
+
+    def contains_many(self, keys):
+        h = hash64_many(keys)
+        fp = (h >> np.uint64(32)) & np.uint64(self.fp_mask)
+        fp[fp == 0] = 1
+        n = np.uint64(self.n_buckets)
+        i1 = h % n
+        i2 = (i1 ^ _splitmix64(fp)) % n
+        fp = fp.astype(self.table.dtype)[:, None]
+        return (self.table[i1] == fp).any(axis=1) | (self.table[i2] == fp).any(axis=1)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+
+def make(name, q, r, n):
+    if name == "quotient":
+        return QuotientFilter(q, r)
+    if name == "bloom":
+        return BloomFilter(q, r, n)
+    if name == "cuckoo":
+        return CuckooFilter(q, r)
+    return SetFilter(q, r)
+
+
+def rate(n, fn):
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def measure(name, q, r, alpha, keys, misses, tail):
+    # строим до α: основная часть пачкой, последние tail ключей по одному — цена вставки при этой загрузке
+    n = int(alpha * (1 << q))
+    head = keys[:n - tail]
+    last = keys[n - tail:n].tolist()
+    f = make(name, q, r, n)
+    bulk_rate = rate(len(head), lambda: f.add_many(head))
+    insert_rate = rate(len(last), lambda: [f.add(x) for x in last])
+
+    probe = np.concatenate([keys[:n][-len(misses) // 2:], misses[:len(misses) // 2]]).tolist()
+    lookup_rate = rate(len(probe), lambda: [x in f for x in probe])
+    batch_rate = rate(len(misses), lambda: f.contains_many(misses))
+    found = f.contains_many(keys[:n])
+    row = {
+        "filter": name, "q": q, "r": r, "alpha": alpha, "n": n,
+        "bulk_insert_per_s": bulk_rate,
+        "insert_per_s": insert_rate,
+        "lookup_per_s": lookup_rate,
+        "batch_lookup_per_s": batch_rate,
+        "bytes_per_elem": f.nbytes / n,
+        "fpr": float(f.contains_many(misses).mean()),
+        "false_negatives": int((~found).sum()),
+    }
+    if name == "quotient":
+        row["packed_bytes_per_elem"] = f.pack().nbytes / n
+    return row
+
+
+def print_table(rows):
+    # B/packed — упакованный quotient filter (r+3 бит на слот), у остальных нет
+    print(f"{'filter':>9} {'q':>3} {'r':>3} {'α':>5} {'bulk/s':>10} {'insert/s':>10} {'lookup/s':>10} "
+          f"{'batch/s':>11} {'B/elem':>7} {'B/packed':>8} {'fpr':>8} {'fn':>4}")
+    for row in rows:
+        packed = f"{row['packed_bytes_per_elem']:8.2f}" if "packed_bytes_per_elem" in row else f"{'-':>8}"
+        print(
+            f"{row['filter']:>9} {row['q']:3d} {row['r']:3d} {row['alpha']:5.2f} {row['bulk_insert_per_s']:10.0f} "
+            f"{row['insert_per_s']:10.0f} {row['lookup_per_s']:10.0f} {row['batch_lookup_per_s']:11.0f} "
+            f"{row['bytes_per_elem']:7.2f} {packed} {row['fpr']:8.5f} {row['false_negatives']:4d}"
+        )
+
+
+def plot(rows, directory):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    os.makedirs(directory, exist_ok=True)
+    metrics = [
+        ("insert_per_s", "вставок/с (по одному)"),
+        ("lookup_per_s", "поисков/с (по одному)"),
+        ("bytes_per_elem", "байт на элемент"),
+        ("fpr", "доля ложных срабатываний"),
+    ]
+    # все оси логарифмические: set на порядки быстрее и больше фильтров
+    for q, r in sorted({(row["q"], row["r"]) for row in rows}):
+        fig, axes = plt.subplots(2, 2, figsize=(11, 8))
+        for ax, (metric, title) in zip(axes.ravel(), metrics):
+            series = [(name, metric) for name in sorted({row["filter"] for row in rows})]
+            if metric == "bytes_per_elem" and any("packed_bytes_per_elem" in row for row in rows):
+                series.append(("quotient", "packed_bytes_per_elem"))
+            for name, key in series:
+                points = [row for row in rows if (row["q"], row["r"], row["filter"]) == (q, r, name)]
+                # нули (у set нет ложных срабатываний) на log-оси не рисуются
+                values = [row[key] or np.nan for row in points]
+                if all(np.isnan(values)):
+                    continue
+                label = name if key == metric else f"{name} (packed)"
+                ax.plot([row["alpha"] for row in points], values, marker="o", label=label)
+            ax.set_title(title)
+            ax.set_xlabel("α")
+            ax.set_yscale("log")
+            ax.legend()
+        fig.suptitle(f"q={q}, r={r}")
+        fig.tight_layout()
+        path = os.path.join(directory, f"filters_q{q}_r{r}.png")
+        fig.savefig(path)
+        plt.close(fig)
+        print(f"saved {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--q", type=int, nargs="+", default=[12, 16])
+    parser.add_argument("--r", type=int, nargs="+", default=[8, 12])
+    parser.add_argument("--alpha", type=float, nargs="+", default=[0.25, 0.5, 0.75, 0.9])
+    parser.add_argument("--filters", nargs="+", default=["set", "quotient", "bloom", "cuckoo"])
+    parser.add_argument("--queries", type=int, default=20000, help="ключей не из набора для FPR и поиска")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="JSON со всеми строками таблицы")
+    parser.add_argument("--plot", help="каталог для графиков по каждой паре q, r")
+    args = parser.parse_args()
+
+    # прогрев: первые вызовы numpy и кешей хеша не должны попасть в первую строку таблицы
+    warm = np.arange(1000)
+    for name in args.filters:
+        measure(name, 10, 8, 0.5, warm, warm + 2**61, 10)
+
+    rows = []
+    for q in args.q:
+        m = 1 << q
+        rng = np.random.default_rng(args.seed + q)
+        # вставляемые и отсутствующие ключи из непересекающихся диапазонов
+        keys = rng.integers(0, 2**61, int(max(args.alpha) * m))
+        misses = rng.integers(2**61, 2**62, args.queries)
+        tail = max(1, min(2000, int(min(args.alpha) * m) // 10))
+        for r in args.r:
+            for alpha in args.alpha:
+                for name in args.filters:
+                    rows.append(measure(name, q, r, alpha, keys, misses, tail))
+    print_table(rows)
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump({"params": vars(args), "rows": rows}, f, indent=2)
+        print(f"saved {args.out}")
+    if args.plot:
+        plot(rows, args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Время ответа GET /products и GET /users на больших страницах: прежний путь (ORM-объекты,
+model_validate по строке, сериализация FastAPI) против нового (select по колонкам схемы,
+строки как есть, orjson). Приложение с обоими вариантами собирается здесь же и вызывается
+через httpx ASGITransport; вместо Postgres — временная SQLite (нужен aiosqlite), так что
+сравнивается именно цена материализации и сериализации, а не сети и планировщика БД.
+
+    pip install aiosqlite
+    python benchmarks/bench_list_serialization.py --rows 10000 100000 --repeat 5 --out results/lists.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from fastapi import Depends, FastAPI, Request, Response
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from conftest import import_service
+
+product_models, product_schemas, pagination = import_service("product_service", "models", "schemas", "pagination")
+user_models, user_schemas = import_service("user_service", "models", "schemas")
+Product, ProductOut = product_models.Product, product_schemas.ProductOut
+User, UserOut = user_models.User, user_schemas.UserOut
+
+# search_vector в Product — вычисляемая колонка Postgres, в выдачу не входит; таблицы создаём вручную
+DDL = [
+    "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT NOT NULL, description TEXT, "
+    "price REAL NOT NULL, created_at TIMESTAMP)",
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, role TEXT NOT NULL, vk_id TEXT, "
+    "email TEXT, created_at TIMESTAMP)",
+]
+
+
+def build_app(session_factory):
+    app = FastAPI()
+
+    async def get_db():
+        async with session_factory() as db:
+            yield db
+
+    product_columns = pagination.out_columns(Product, ProductOut)
+    user_columns = pagination.out_columns(User, UserOut)
+
+    @app.get("/old/products", response_model=list[ProductOut])
+    async def old_products(limit: int, db: AsyncSession = Depends(get_db)):
+        result = await db.execute(pagination.keyset_page(select(Product), Product.id, None, limit))
+        return [ProductOut.model_validate(p, from_attributes=True) for p in result.scalars().all()]
+
+    @app.get("/new/products", response_model=list[ProductOut])
+    async def new_products(request: Request, response: Response, limit: int, db: AsyncSession = Depends(get_db)):
+        rows = await pagination.fetch_rows(db, pagination.keyset_page(select(*product_columns), Product.id, None, limit))
+        return pagination.json_page(request, response, pagination.encode_page(rows, limit), limit)
+
+    @app.get("/old/users", response_model=list[UserOut])
+    async def old_users(limit: int, db: AsyncSession = Depends(get_db)):
+        result = await db.execute(pagination.keyset_page(select(User), User.id, None, limit))
+        return result.scalars().all()
+
+    @app.get("/new/users", response_model=list[UserOut])
+    async def new_users(request: Request, response: Response, limit: int, db: AsyncSession = Depends(get_db)):
+        rows = await pagination.fetch_rows(db, pagination.keyset_page(select(*user_columns), User.id, None, limit))
+        return pagination.json_page(request, response, pagination.encode_page(rows, limit), limit)
+
+    return app
+
+
+async def fill(engine, rows):
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    products = [
+        {"id": i, "name": f"product {i}", "description": f"description of product {i}" if i % 3 else None,
+         "price": i % 1000 + 0.99, "created_at": created + timedelta(seconds=i)}
+        for i in range(1, rows + 1)
+    ]
+    users = [
+        {"id": i, "username": f"user{i}", "role": "admin" if i == 1 else "user", "vk_id": str(i) if i % 2 else None,
+         "email": f"user{i}@example.com", "created_at": created + timedelta(seconds=i)}
+        for i in range(1, rows + 1)
+    ]
+    async with engine.begin() as conn:
+        for ddl in DDL:
+            await conn.execute(text(ddl))
+        await conn.execute(Product.__table__.insert(), products)
+        await conn.execute(User.__table__.insert(), users)
+
+
+async def timed(client, path, limit, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        r = await client.get(path, params={"limit": limit})
+        samples.append(time.perf_counter() - started)
+        assert r.status_code == 200 and len(r.json()) == limit, r.text[:200]
+    return statistics.median(samples) * 1000, len(r.content)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="размеры страницы")
+    parser.add_argument("--repeat", type=int, default=5, help="запросов на точку, берётся медиана")
+    parser.add_argument("--out", help="JSON с результатами")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/bench.db")
+        await fill(engine, max(args.rows))
+        app = build_app(async_sessionmaker(engine, expire_on_commit=False))
+        results = []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            # прогрев: первые запросы компилируют SQL и схемы pydantic
+            for path in ("/old/products", "/new/products", "/old/users", "/new/users"):
+                await timed(client, path, 100, 2)
+            print(f"{'endpoint':>9} {'rows':>7} {'old ms':>9} {'new ms':>9} {'speedup':>8} {'KiB':>8}")
+            for rows in args.rows:
+                for name in ("products", "users"):
+                    old_ms, _ = await timed(client, f"/old/{name}", rows, args.repeat)
+                    new_ms, size = await timed(client, f"/new/{name}", rows, args.repeat)
+                    results.append({"endpoint": name, "rows": rows, "old_ms": old_ms, "new_ms": new_ms, "bytes": size})
+                    print(f"{name:>9} {rows:7d} {old_ms:9.1f} {new_ms:9.1f} {old_ms / new_ms:7.1f}x {size / 1024:8.0f}")
+        await engine.dispose()
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump({"params": vars(args), "rows": results}, f, indent=2)
+        print(f"saved {args.out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+Задержка GET / при параллельной нагрузке на логин: bcrypt прямо в event loop
+против пула процессов из auth_service/hashing.py.
+
+    python benchmarks/bench_password_hashing.py --logins 32 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "auth_service"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from fastapi import FastAPI
+
+import hashing
+
+PASSWORD = "password1"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    idx = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def build_app(mode: str, hashed: str):
+    app = FastAPI()
+
+    @app.get("/")
+    def root():
+        return {"service": "auth"}
+
+    @app.post("/login")
+    async def login():
+        if mode == "blocking":
+            ok = hashing.pwd_context.verify(PASSWORD, hashed)
+        else:
+            ok = await hashing.verify_password(PASSWORD, hashed)
+        return {"ok": ok}
+
+    return app
+
+
+async def run(mode: str, logins: int, duration: float, hashed: str):
+    app = build_app(mode, hashed)
+    transport = httpx.ASGITransport(app=app)
+    deadline = time.perf_counter() + duration
+    root_latencies = []
+    login_count = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login_worker():
+            nonlocal login_count
+            while time.perf_counter() < deadline:
+                await client.post("/login")
+                login_count += 1
+
+        async def probe():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get("/")
+                root_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(probe(), *(login_worker() for _ in range(logins)))
+
+    return {
+        "mode": mode,
+        "logins_per_sec": login_count / duration,
+        "root_p50_ms": percentile(root_latencies, 50) * 1000,
+        "root_p99_ms": percentile(root_latencies, 99) * 1000,
+        "root_max_ms": max(root_latencies) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32, help="параллельных логинов")
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на каждый режим")
+    args = parser.parse_args()
+
+    hashed = hashing.pwd_context.hash(PASSWORD)
+    hashing.start_hashing_pool()
+    try:
+        for mode in ("blocking", "pool"):
+            res = asyncio.run(run(mode, args.logins, args.duration, hashed))
+            print(
+                f"{res['mode']:>8}: logins/s={res['logins_per_sec']:8.1f}  "
+                f"GET / p50={res['root_p50_ms']:8.2f}ms  p99={res['root_p99_ms']:8.2f}ms  "
+                f"max={res['root_max_ms']:8.2f}ms"
+            )
+    finally:
+        hashing.stop_hashing_pool()
+
+
+if __name__ == "__main__":
+    main()
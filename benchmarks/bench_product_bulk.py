@@ -0,0 +1,87 @@
+"""
+Строк в секунду для POST /products/bulk (COPY FROM) и GET /products/export (COPY TO STDOUT)
+в сравнении с поштучным POST /products. Приложение product_service запускается в процессе
+(httpx ASGITransport), БД — настоящая:
+
+    DB_HOST=localhost python benchmarks/bench_product_bulk.py --rows 200000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "product_service"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import jwt
+from sqlalchemy import delete
+
+from config import SECRET_KEY, ALGORITHM
+from database import AsyncSessionLocal, engine
+from main import app
+from models import Product
+
+
+def admin_headers():
+    token = jwt.encode({"sub": "0", "role": "admin", "exp": int(time.time()) + 3600}, SECRET_KEY, algorithm=ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def ndjson_body(rows, prefix, piece=1000):
+    for start in range(0, rows, piece):
+        yield "".join(
+            json.dumps({"name": f"{prefix}{i}", "description": "bulk benchmark", "price": i % 1000 + 0.99}) + "\n"
+            for i in range(start, min(rows, start + piece))
+        ).encode()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--single", type=int, default=2_000, help="сколько строк грузить поштучно для сравнения")
+    args = parser.parse_args()
+
+    prefix = f"bench_bulk_{int(time.time())}_"
+    headers = admin_headers()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            started = time.perf_counter()
+            for i in range(args.single):
+                r = await client.post("/products", json={"name": f"{prefix}single{i}", "price": 1.0}, headers=headers)
+                assert r.status_code == 200
+            single = args.single / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            r = await client.post(
+                "/products/bulk",
+                content=ndjson_body(args.rows, prefix),
+                headers={**headers, "Content-Type": "application/x-ndjson"},
+            )
+            elapsed = time.perf_counter() - started
+            assert r.status_code == 200, r.text
+            assert r.json()["inserted"] == args.rows
+            bulk_in = args.rows / elapsed
+
+            started = time.perf_counter()
+            exported = 0
+            async with client.stream("GET", "/products/export", headers=headers) as r:
+                async for chunk in r.aiter_bytes():
+                    exported += chunk.count(b"\n")
+            export_out = (exported - 1) / (time.perf_counter() - started)
+
+        print(f"POST /products (по одному): {single:10.0f} rows/s")
+        print(f"POST /products/bulk (COPY): {bulk_in:10.0f} rows/s  ({args.rows} rows)")
+        print(f"GET /products/export:       {export_out:10.0f} rows/s  ({exported - 1} rows)")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Product).where(Product.name.startswith(prefix)))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""
+Смешанная нагрузка add/remove на QuotientFilter: скользящее окно «последние N ключей»
+(живые сессии, недавние request id). Таблица держится на заданной загрузке, каждый шаг —
+вставка нового ключа и удаление самого старого; для сравнения — пересборка окна целиком.
+
+    python benchmarks/bench_quotient_filter_delete.py --q 16 --r 12 --ops 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from common.quotient_filter import QuotientFilter
+
+LOADS = (0.5, 0.75, 0.9)
+
+
+def churn(qf, keys, window, ops):
+    # в окне всегда window ключей: вставка нового, удаление самого старого
+    start = time.perf_counter()
+    for i in range(ops // 2):
+        qf.add(keys[window + i])
+        qf.remove(keys[i])
+    elapsed = time.perf_counter() - start
+    assert len(qf) <= window and all(x in qf for x in keys[ops // 2:ops // 2 + window][-1000:])
+    return ops / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--q", type=int, default=16)
+    parser.add_argument("--r", type=int, default=12)
+    parser.add_argument("--ops", type=int, default=50000)
+    args = parser.parse_args()
+
+    m = 1 << args.q
+    keys = np.random.default_rng(0).integers(0, 2**62, m + args.ops).tolist()
+
+    print(f"{'mode':>9} {'load':>5} {'ops/s':>10} {'rebuild ms':>11}")
+    for counting in (False, True):
+        mode = "counting" if counting else "plain"
+        for load in LOADS:
+            window = int(load * m)
+            qf = QuotientFilter(args.q, args.r, counting=counting)
+            qf.add_many(np.array(keys[:window]))
+            ops_rate = churn(qf, keys, window, args.ops)
+            # альтернатива без remove: собрать фильтр по текущему окну заново
+            fresh = QuotientFilter(args.q, args.r, counting=counting)
+            start = time.perf_counter()
+            fresh.add_many(np.array(keys[args.ops // 2:args.ops // 2 + window]))
+            rebuild_ms = (time.perf_counter() - start) * 1000
+            print(f"{mode:>9} {load:5.2f} {ops_rate:10.0f} {rebuild_ms:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
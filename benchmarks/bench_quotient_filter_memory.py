@@ -0,0 +1,57 @@
+"""
+Память на слот и на элемент у QuotientFilter (uint64 + три bool-массива) против
+PackedQuotientFilter (r+3 бит на слот), плюс размер файла и скорость lookup из np.memmap.
+
+    python benchmarks/bench_quotient_filter_memory.py --q 20 --r 4 8 16 --alpha 0.5 0.9
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from common.quotient_filter import QuotientFilter, PackedQuotientFilter
+
+
+def lookups_per_sec(qf, queries):
+    start = time.perf_counter()
+    for x in queries:
+        x in qf
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--q", type=int, default=20)
+    parser.add_argument("--r", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--alpha", type=float, nargs="+", default=[0.5, 0.9])
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.integers(0, 2**62, args.lookups).tolist()
+    print(f"{'r':>3} {'alpha':>6} {'B/slot':>7} {'B/slot packed':>14} {'B/elem':>7} {'B/elem packed':>14} "
+          f"{'file KB':>8} {'lookup/s':>10} {'memmap lookup/s':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for r in args.r:
+            for alpha in args.alpha:
+                qf = QuotientFilter(args.q, r)
+                qf.add_many(rng.integers(0, 2**62, int(alpha * qf.m)))
+                path = os.path.join(tmp, f"qf_{r}_{alpha}.qf")
+                qf.save(path)
+                packed = PackedQuotientFilter.load(path, mmap=True)
+                n = len(qf)
+                print(
+                    f"{r:3d} {alpha:6.2f} {qf.nbytes / qf.m:7.3f} {packed.nbytes / qf.m:14.3f} "
+                    f"{qf.nbytes / n:7.3f} {packed.nbytes / n:14.3f} {os.path.getsize(path) / 1024:8.0f} "
+                    f"{lookups_per_sec(qf, queries):10.0f} {lookups_per_sec(packed, queries):16.0f}"
+                )
+                del packed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Скорость вставки и поиска QuotientFilter по мере заполнения: фиксированная таблица
+против таблицы с авторасширением (max_load), плюс слияние шардов через merge().
+
+    python benchmarks/bench_quotient_filter_resize.py --q 16 --r 12 --max-load 0.75 --shards 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from common.quotient_filter import QuotientFilter
+
+LOADS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+
+
+def rate(n, fn):
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def fill_and_measure(qf, keys, misses, step):
+    # вставляем по одному до следующей доли от исходного размера и меряем последнюю порцию
+    done = 0
+    rows = []
+    for load in LOADS:
+        target = int(load * step)
+        chunk = keys[done:target].tolist()
+        add_rate = rate(len(chunk), lambda: [qf.add(x) for x in chunk])
+        done = target
+        probe = keys[:done][-2000:].tolist()
+        hit_rate = rate(len(probe), lambda: [x in qf for x in probe])
+        miss_rate = rate(len(misses), lambda: [x in qf for x in misses])
+        rows.append((load, qf.q, qf.load_factor, add_rate, hit_rate, miss_rate))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--q", type=int, default=16)
+    parser.add_argument("--r", type=int, default=12)
+    parser.add_argument("--max-load", type=float, default=0.75)
+    parser.add_argument("--shards", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    m = 1 << args.q
+    keys = rng.integers(0, 2**62, int(max(LOADS) * m))
+    misses = rng.integers(2**62, 2**63 - 1, 2000).tolist()
+
+    print(f"{'mode':>8} {'n/m0':>5} {'q':>3} {'load':>6} {'add/s':>10} {'hit/s':>10} {'miss/s':>10}")
+    for mode, max_load in (("fixed", None), ("resize", args.max_load)):
+        qf = QuotientFilter(args.q, args.r, max_load=max_load)
+        for load, q, lf, add_rate, hit_rate, miss_rate in fill_and_measure(qf, keys, misses, m):
+            print(f"{mode:>8} {load:5.2f} {q:3d} {lf:6.2f} {add_rate:10.0f} {hit_rate:10.0f} {miss_rate:10.0f}")
+
+    # шарды собираются независимо (например, в разных процессах), потом сливаются
+    shards = [QuotientFilter(args.q, args.r, max_load=args.max_load) for _ in range(args.shards)]
+    for i, shard in enumerate(shards):
+        shard.add_many(keys[i::args.shards])
+    merged = QuotientFilter(args.q, args.r, max_load=args.max_load)
+    merge_rate = rate(len(keys), lambda: [merged.merge(shard) for shard in shards])
+    single = QuotientFilter(args.q, args.r, max_load=args.max_load)
+    bulk_rate = rate(len(keys), lambda: single.add_many(keys))
+    assert np.array_equal(merged.fingerprints(), single.fingerprints())
+    print(f"\nmerge of {args.shards} shards: {merge_rate:10.0f} keys/s   add_many of all keys: {bulk_rate:10.0f} keys/s")
+
+
+if __name__ == "__main__":
+    main()
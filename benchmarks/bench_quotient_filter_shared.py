@@ -0,0 +1,91 @@
+"""
+Чтение QuotientFilter из нескольких процессов: один сегмент shared memory на всех
+(SharedQuotientFilter, seqlock) против собственной копии в каждом процессе.
+С --churn родительский процесс одновременно вставляет и удаляет ключи в общем фильтре.
+
+    python benchmarks/bench_quotient_filter_shared.py --q 18 --r 12 --procs 1 2 4 8 --churn
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from common.quotient_filter import QuotientFilter
+from common.shared_quotient_filter import SharedQuotientFilter
+
+
+def reader(qf, keys, duration, start, results):
+    # qf приходит через pickle: SharedQuotientFilter подключается к сегменту, QuotientFilter копируется
+    keys = keys.tolist()
+    start.wait()
+    done = hits = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        i = done % len(keys)
+        for x in keys[i:i + 1000]:
+            hits += x in qf
+        done += 1000
+    results.put((done, hits))
+
+
+def measure(ctx, qf, keys, procs, duration, churn=None):
+    start, results = ctx.Event(), ctx.Queue()
+    workers = [ctx.Process(target=reader, args=(qf, keys, duration, start, results)) for _ in range(procs)]
+    for w in workers:
+        w.start()
+    time.sleep(0.5 + 0.2 * procs)  # импорт numpy в дочерних процессах
+    start.set()
+    writes = 0
+    if churn is not None:
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            x = churn[writes % len(churn)]
+            qf.add(x)
+            qf.remove(x)
+            writes += 2
+    done = [results.get() for _ in workers]
+    for w in workers:
+        w.join()
+    return sum(d for d, _ in done) / duration, writes / duration
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--q", type=int, default=18)
+    parser.add_argument("--r", type=int, default=12)
+    parser.add_argument("--load", type=float, default=0.75)
+    parser.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--churn", action="store_true", help="писать в общий фильтр во время чтения")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, 2**62, int(args.load * (1 << args.q)))
+    churn = rng.integers(0, 2**62, 10000).tolist()
+    probe = np.concatenate([keys[:5000], rng.integers(0, 2**62, 5000)])
+
+    private = QuotientFilter(args.q, args.r)
+    private.add_many(keys)
+    with SharedQuotientFilter(args.q, args.r) as shared:
+        shared.add_many(keys)
+        print(f"cpu: {os.cpu_count()}, filter: {private.nbytes / 2**20:.1f} MiB per copy, "
+              f"shared segment: {shared._shm.size / 2**20:.1f} MiB")
+        print(f"{'mode':>14} {'procs':>5} {'lookups/s':>11} {'memory MiB':>11} {'writes/s':>9}")
+        for procs in args.procs:
+            rows = [("private", private, None), ("shared", shared, None)]
+            if args.churn:
+                rows.append(("shared+writes", shared, churn))
+            for mode, qf, writes in rows:
+                lookups, write_rate = measure(ctx, qf, probe, procs, args.duration, writes)
+                memory = (private.nbytes * procs if qf is private else shared._shm.size) / 2**20
+                print(f"{mode:>14} {procs:5d} {lookups:11.0f} {memory:11.1f} {write_rate:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
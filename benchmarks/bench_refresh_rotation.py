@@ -0,0 +1,89 @@
+"""
+Пропускная способность refresh: старый поток (SELECT + INSERT/commit + SELECT/commit)
+против rotate_refresh_token (один UPDATE ... RETURNING + INSERT и один commit).
+
+Работает напрямую с БД через модули auth_service:
+
+    DB_HOST=localhost python benchmarks/bench_refresh_rotation.py --workers 16 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "auth_service"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import delete
+
+from auth import (
+    create_refresh_token, save_refresh_token, is_refresh_token_valid,
+    revoke_refresh_token, rotate_refresh_token
+)
+from database import AsyncSessionLocal, engine
+from models import User, RefreshToken
+
+
+async def legacy_refresh(db, user_id, token):
+    if not await is_refresh_token_valid(db, token):
+        return None
+    new_token = create_refresh_token({"sub": user_id, "role": "user"})
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+    await save_refresh_token(db, user_id, new_token, expires_at)
+    await revoke_refresh_token(db, token)
+    return new_token
+
+
+async def atomic_refresh(db, user_id, token):
+    new_token = create_refresh_token({"sub": user_id, "role": "user"})
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+    if not await rotate_refresh_token(db, token, new_token, expires_at):
+        return None
+    return new_token
+
+
+async def run(flow, user_id, workers, duration):
+    done = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal done
+        async with AsyncSessionLocal() as db:
+            token = create_refresh_token({"sub": user_id, "role": "user"})
+            await save_refresh_token(db, user_id, token, datetime.now(timezone.utc) + timedelta(days=7))
+            while time.perf_counter() < deadline:
+                token = await flow(db, user_id, token)
+                assert token is not None
+                done += 1
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return done / duration
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        user = User(username=f"bench_rotation_{int(time.time())}", role="user")
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+    try:
+        for name, flow in (("legacy", legacy_refresh), ("atomic", atomic_refresh)):
+            rps = await run(flow, user.id, args.workers, args.duration)
+            print(f"{name:>7}: {rps:8.1f} refresh/s  (workers={args.workers})")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user.id))
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
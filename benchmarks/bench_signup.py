@@ -0,0 +1,80 @@
+"""
+Регистраций в секунду: старый путь auth_service (SELECT admin + SELECT username + INSERT +
+commit + refresh) против create_user (INSERT ... ON CONFLICT DO NOTHING RETURNING) с флагом admin.
+bcrypt исключён — хеш один и тот же, меряется только работа с БД:
+
+    DB_HOST=localhost python benchmarks/bench_signup.py --workers 16 --users 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "auth_service"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from auth import admin_probe, create_user
+from database import AsyncSessionLocal, engine
+from hashing import pwd_context
+from models import User
+
+PASSWORD_HASH = pwd_context.hash("password1")
+
+
+async def legacy_signup(db, username):
+    result = await db.execute(select(User).where(User.role == "admin"))
+    is_admin_present = result.scalars().first() is not None
+    result = await db.execute(select(User).where(User.username == username))
+    if result.scalars().first():
+        return None
+    user = User(username=username, password_hash=PASSWORD_HASH, role="user" if is_admin_present else "admin")
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+async def upsert_signup(db, username):
+    role = "user" if await admin_probe.exists(db) else "admin"
+    return await create_user(db, username, PASSWORD_HASH, role)
+
+
+async def run(flow, prefix, workers, users):
+    queue = asyncio.Queue()
+    for i in range(users):
+        queue.put_nowait(f"{prefix}{i}")
+
+    async def worker():
+        async with AsyncSessionLocal() as db:
+            while not queue.empty():
+                assert await flow(db, queue.get_nowait()) is not None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return users / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+
+    prefix = f"bench_signup_{int(time.time())}_"
+    try:
+        for name, flow in (("legacy", legacy_signup), ("upsert", upsert_signup)):
+            rps = await run(flow, f"{prefix}{name}_", args.workers, args.users)
+            print(f"{name:>7}: {rps:8.1f} signups/s  (workers={args.workers})")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.username.startswith(prefix)))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
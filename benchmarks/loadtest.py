@@ -0,0 +1,322 @@
+"""
+Нагрузочный прогон auth/user/product сервисов: сценарии, параллельность, RPS и p50/p95/p99
+по каждому эндпоинту, результаты в JSON для сравнения релизов.
+
+Цели:
+  --target asgi  — приложения поднимаются в этом процессе (httpx.ASGITransport), нужна только БД;
+  --target live  — уже запущенные сервисы по --auth-url/--user-url/--product-url
+                   или все через один шлюз: --gateway http://localhost:8080 (nginx).
+
+Пользователи и товары создаются в той же БД, поэтому нужна отдельная, например контейнер:
+
+    docker run --rm -d -p 5432:5432 -e POSTGRES_DB=lab3 -e POSTGRES_PASSWORD=ufhybnehf23 postgres:17-alpine
+    DB_HOST=localhost alembic upgrade head
+    DB_HOST=localhost python benchmarks/loadtest.py --mix login=1,refresh=2,browse=6,admin=1 \\
+        --concurrency 64 --duration 30 --out results/loadtest.json
+    python benchmarks/loadtest.py --compare results/old.json results/loadtest.json
+
+Напрямую против шлюза (docker compose up, оба прогона на одной машине):
+
+    python benchmarks/loadtest.py --target live --out results/direct.json
+    python benchmarks/loadtest.py --target live --gateway http://localhost:8080 --out results/gateway.json
+    python benchmarks/loadtest.py --compare results/direct.json results/gateway.json
+
+--bypass-cache шлёт Cache-Control: no-cache: мимо микрокеша nginx и кеша product_service.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import httpx
+import jwt
+
+from conftest import import_service
+
+PASSWORD = "password1"
+SCENARIOS = ("login", "refresh", "browse", "admin")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    idx = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, expected one of {SCENARIOS}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    async def call(self, client, label, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+            ok = resp.status_code < 400
+        except httpx.HTTPError:
+            resp, ok = None, False
+        if self.recording:
+            self.latencies[label].append(time.perf_counter() - start)
+            if not ok:
+                self.errors[label] += 1
+        return resp if ok else None
+
+    def summary(self, duration):
+        endpoints = {}
+        for label in sorted(self.latencies):
+            values = self.latencies[label]
+            endpoints[label] = {
+                "requests": len(values),
+                "errors": self.errors[label],
+                "rps": len(values) / duration,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": max(values) * 1000,
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {"total_requests": total, "total_rps": total / duration, "endpoints": endpoints}
+
+
+class VirtualUser:
+    def __init__(self, clients, recorder, username, admin_headers, rng):
+        self.auth, self.user, self.product = clients
+        self.rec = recorder
+        self.username = username
+        self.admin_headers = admin_headers
+        self.rng = rng
+        self.refresh_token = None
+
+    async def login(self):
+        resp = await self.rec.call(
+            self.auth, "POST /login", "POST", "/login", json={"username": self.username, "password": PASSWORD}
+        )
+        if resp is not None:
+            self.refresh_token = resp.json()["refresh_token"]
+
+    async def refresh(self):
+        if self.refresh_token is None:
+            await self.login()
+            return
+        resp = await self.rec.call(
+            self.auth, "POST /token/refresh", "POST", "/token/refresh", json={"refresh_token": self.refresh_token}
+        )
+        self.refresh_token = resp.json()["refresh_token"] if resp is not None else None
+
+    async def browse(self):
+        resp = await self.rec.call(self.product, "GET /products", "GET", "/products", params={"limit": 20})
+        if resp is not None and resp.json():
+            product_id = self.rng.choice(resp.json())["id"]
+            await self.rec.call(self.product, "GET /products/{product_id}", "GET", f"/products/{product_id}")
+        await self.rec.call(
+            self.product, "GET /products/search", "GET", "/products/search",
+            params={"q": self.rng.choice(("loadtest", "item 1", "item 42"))},
+        )
+
+    async def admin(self):
+        resp = await self.rec.call(
+            self.product, "POST /products", "POST", "/products", headers=self.admin_headers,
+            json={"name": f"loadtest item {self.rng.randrange(1000)}", "price": self.rng.randrange(100, 10000) / 100},
+        )
+        if resp is None:
+            return
+        product_id = resp.json()["id"]
+        await self.rec.call(
+            self.product, "PUT /products/{product_id}", "PUT", f"/products/{product_id}", headers=self.admin_headers,
+            json={"name": "loadtest item updated", "price": 1.0},
+        )
+        await self.rec.call(
+            self.product, "DELETE /products/{product_id}", "DELETE", f"/products/{product_id}", headers=self.admin_headers,
+        )
+        await self.rec.call(self.user, "GET /users", "GET", "/users", headers=self.admin_headers, params={"limit": 50})
+
+
+async def seed(clients, run_id, users, admin_headers):
+    auth, _, product = clients
+    names = [f"lt_{run_id}_{i}" for i in range(users)]
+    sem = asyncio.Semaphore(16)
+
+    async def register(name):
+        async with sem:
+            resp = await auth.post("/register", json={"username": name, "password": PASSWORD})
+            resp.raise_for_status()
+
+    await asyncio.gather(*(register(name) for name in names))
+    # немного товаров, чтобы просмотру и поиску было что отдавать
+    for i in range(50):
+        resp = await product.post(
+            "/products", headers=admin_headers, json={"name": f"loadtest item {i}", "price": i + 0.99}
+        )
+        resp.raise_for_status()
+    return names
+
+
+async def open_clients(stack, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Cache-Control": "no-cache"} if args.bypass_cache else None
+    if args.target == "live":
+        urls = [args.gateway] * 3 if args.gateway else [args.auth_url, args.user_url, args.product_url]
+        return [
+            await stack.enter_async_context(
+                httpx.AsyncClient(
+                    base_url=url, limits=limits, timeout=args.timeout, verify=not args.insecure, headers=headers
+                )
+            )
+            for url in urls
+        ]
+    clients = []
+    for service in ("auth_service", "user_service", "product_service"):
+        app = import_service(service, "main").app
+        await stack.enter_async_context(app.router.lifespan_context(app))
+        transport = httpx.ASGITransport(app=app)
+        clients.append(
+            await stack.enter_async_context(
+                httpx.AsyncClient(
+                    transport=transport, base_url=f"http://{service}", timeout=args.timeout, headers=headers
+                )
+            )
+        )
+    return clients
+
+
+def admin_headers():
+    config = import_service("auth_service", "config")
+    token = jwt.encode(
+        {"sub": "0", "role": "admin", "exp": int(time.time()) + 24 * 3600}, config.SECRET_KEY, algorithm=config.ALGORITHM
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    run_id = f"{int(time.time())}_{rng.randrange(10**6)}"
+    headers = admin_headers()
+    recorder = Recorder()
+    async with AsyncExitStack() as stack:
+        clients = await open_clients(stack, args)
+        names = await seed(clients, run_id, args.users, headers)
+        scenarios = list(args.mix)
+        weights = [args.mix[name] for name in scenarios]
+        deadline = None
+
+        async def worker(i):
+            worker_rng = random.Random(args.seed * 1000 + i)
+            vu = VirtualUser(clients, recorder, names[i % len(names)], headers, worker_rng)
+            while deadline is None or time.perf_counter() < deadline:
+                scenario = worker_rng.choices(scenarios, weights)[0]
+                await getattr(vu, scenario)()
+
+        async def clock():
+            nonlocal deadline
+            deadline = time.perf_counter() + args.warmup + args.duration
+            await asyncio.sleep(args.warmup)
+            recorder.recording = True
+            await asyncio.sleep(args.duration)
+
+        await asyncio.gather(clock(), *(worker(i) for i in range(args.concurrency)))
+    return recorder.summary(args.duration)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(summary):
+    print(f"{'endpoint':<32} {'req':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, e in summary["endpoints"].items():
+        print(
+            f"{label:<32} {e['requests']:7d} {e['errors']:5d} {e['rps']:8.1f} "
+            f"{e['p50_ms']:8.2f} {e['p95_ms']:8.2f} {e['p99_ms']:8.2f}"
+        )
+    print(f"{'total':<32} {summary['total_requests']:7d} {'':>5} {summary['total_rps']:8.1f}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)["summary"]["endpoints"]
+    with open(new_path) as f:
+        new = json.load(f)["summary"]["endpoints"]
+    print(f"{'endpoint':<32} {'rps old':>9} {'rps new':>9} {'p95 old':>9} {'p95 new':>9} {'p95 Δ%':>8}")
+    for label in sorted(set(old) | set(new)):
+        o, n = old.get(label), new.get(label)
+        if o is None or n is None:
+            print(f"{label:<32} {'только в ' + (old_path if n is None else new_path)}")
+            continue
+        delta = (n["p95_ms"] - o["p95_ms"]) / o["p95_ms"] * 100 if o["p95_ms"] else 0.0
+        print(f"{label:<32} {o['rps']:9.1f} {n['rps']:9.1f} {o['p95_ms']:9.2f} {n['p95_ms']:9.2f} {delta:+8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=("asgi", "live"), default="asgi")
+    parser.add_argument("--auth-url", default="http://localhost:8000")
+    parser.add_argument("--user-url", default="http://localhost:8001")
+    parser.add_argument("--product-url", default="http://localhost:8002")
+    parser.add_argument("--gateway", help="один адрес для всех сервисов (nginx), вместо трёх --*-url")
+    parser.add_argument("--bypass-cache", action="store_true", help="Cache-Control: no-cache на всех запросах")
+    parser.add_argument("--insecure", action="store_true", help="не проверять сертификат (самоподписанный за nginx)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("login=1,refresh=2,browse=6,admin=1"),
+                        help="веса сценариев: login, refresh, browse, admin")
+    parser.add_argument("--concurrency", type=int, default=32, help="виртуальных пользователей")
+    parser.add_argument("--users", type=int, default=100, help="сколько пользователей зарегистрировать")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0, help="секунд без записи результатов")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="куда сохранить JSON с результатами")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="сравнить два сохранённых прогона")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    summary = asyncio.run(run(args))
+    print_summary(summary)
+    if args.out:
+        result = {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "target": args.target, "gateway": args.gateway, "bypass_cache": args.bypass_cache,
+                "mix": args.mix, "concurrency": args.concurrency, "users": args.users,
+                "duration": args.duration, "warmup": args.warmup, "seed": args.seed,
+            },
+            "summary": summary,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from sqlalchemy import exists, select
+
+
+class AdminProbe:
+    """Есть ли в users хотя бы один admin — по нему первый зарегистрированный получает роль admin.
+
+    Флаг процесса: раз админ появился, он уже не пропадает, и проверка в БД больше не нужна.
+    Модель User передаёт сервис: у каждого она своя.
+    """
+
+    def __init__(self, user_model):
+        self.user_model = user_model
+        self.known = False
+
+    async def exists(self, db) -> bool:
+        if not self.known:
+            result = await db.execute(select(exists().where(self.user_model.role == "admin")))
+            self.known = bool(result.scalar())
+        return self.known
+
+    def mark(self, role: str):
+        # вызывается после записи роли: новый admin виден без запроса в БД
+        if role == "admin":
+            self.known = True
@@ -0,0 +1,75 @@
+import os
+import time
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Общие настройки движка для всех сервисов; у каждого контейнера свои значения в окружении
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_ECHO = _env_bool("DB_ECHO", False)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # Пул, который замеряет, сколько запрос ждал свободное соединение (вместе с открытием нового)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = time.perf_counter() - start
+            self.checkouts += 1
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+
+class Database:
+    def __init__(self, url: str):
+        self.engine = create_async_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE,
+            echo=DB_ECHO,
+            connect_args={
+                # кеш prepared statements SQLAlchemy и кеш запросов asyncpg (0 — выключить, нужно за pgbouncer)
+                "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+                "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            },
+        )
+        self.sessionmaker = sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_db(self):
+        async with self.sessionmaker() as session:
+            yield session
+
+    def stats(self):
+        pool = self.engine.pool
+        capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+        checked_out = pool.checkedout()
+        return {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checked_out": checked_out,
+            "overflow": pool.overflow(),
+            "utilisation": checked_out / capacity if capacity else 0.0,
+            "checkouts": pool.checkouts,
+            "checkout_wait_seconds_total": pool.checkout_wait_total,
+            "checkout_wait_seconds_max": pool.checkout_wait_max,
+        }
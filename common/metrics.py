@@ -0,0 +1,146 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import FastAPI, Response
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса",
+    ["service", "method", "route", "status"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Время выполнения SQL-запроса",
+    ["service", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Число SQL-запросов на один HTTP-запрос",
+    ["service", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+OPERATION_LATENCY = Histogram(
+    "operation_duration_seconds", "Время отдельных операций (bcrypt, JWT)",
+    ["operation"],
+    buckets=(0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+# Счётчик SQL-запросов текущего HTTP-запроса; список, чтобы его можно было менять из greenlet SQLAlchemy
+_query_count = ContextVar("db_query_count", default=None)
+
+
+def observe_operation(operation: str, seconds: float):
+    OPERATION_LATENCY.labels(operation).observe(seconds)
+
+
+@contextmanager
+def timed(operation: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_operation(operation, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    # Чистый ASGI-middleware: не буферизует потоковые ответы, в отличие от BaseHTTPMiddleware
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        counter = [0]
+        token = _query_count.set(counter)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _query_count.reset(token)
+            # шаблон маршрута (/products/{product_id}), а не сырой путь — иначе метки разрастаются
+            route = scope.get("route")
+            template = route.path if route is not None else "<unmatched>"
+            REQUEST_LATENCY.labels(self.service, scope["method"], template, str(status)).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(self.service, template).observe(counter[0])
+
+
+def instrument_engine(engine, service: str):
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_LATENCY.labels(service, operation).observe(elapsed)
+        counter = _query_count.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+class StatsCollector:
+    # Публикует словари из *_stats() как gauge; вложенные ключи склеиваются через "_"
+    def __init__(self):
+        self.sources = {}
+
+    def collect(self):
+        for prefix, stats in self.sources.items():
+            for name, value in _flatten(prefix, stats()):
+                metric = GaugeMetricFamily(name, f"{prefix} stats")
+                metric.add_metric([], value)
+                yield metric
+
+
+def _flatten(prefix, stats):
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, (int, float)):
+            yield name, float(value)
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def register_stats(prefix: str, stats):
+    stats_collector.sources[prefix] = stats
+
+
+def setup_metrics(app: FastAPI, service: str, database=None):
+    app.add_middleware(MetricsMiddleware, service=service)
+    if database is not None:
+        instrument_engine(database.engine, service)
+        register_stats("db_pool", database.stats)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(generate_latest(_scrape_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+def _scrape_registry():
+    # Несколько процессов uvicorn (common.server): гистограммы суммируются по файлам всех процессов,
+    # а счётчики пулов и кешей из register_stats — только того процесса, что ответил на запрос
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(stats_collector)
+    return registry
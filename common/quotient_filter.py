@@ -0,0 +1,614 @@
+import hashlib
+import struct
+import numpy as np
+
+MASK64 = (1 << 64) - 1
+RANK_BLOCK = 64                                     # слотов на один счётчик rank-индекса
+# если пачка заметная относительно таблицы, дешевле пересобрать таблицу целиком, чем вставлять по одному
+BULK_REBUILD_RATIO = 1 / 32
+# файл упакованного фильтра: заголовок фиксированной длины, дальше слова '<u8' — их можно открыть через np.memmap
+PACKED_MAGIC = b"QFPK"
+PACKED_VERSION = 1
+PACKED_HEADER = struct.Struct("<4sHBBQ")             # magic, version, q, r, count
+PACKED_HEADER_SIZE = 64
+# счётчик повторов в режиме counting; дошедший до предела счётчик «залипает» и больше не уменьшается
+COUNTER_DTYPE = np.uint32
+COUNTER_MAX = np.iinfo(COUNTER_DTYPE).max
+
+
+def _splitmix64_int(x):
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def _splitmix64(x):
+    # та же функция на массиве uint64; переполнение при умножении — это и есть mod 2^64
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _key_to_int(x):
+    # целые хешируются как есть, остальное — через 8 байт blake2b от строки
+    if isinstance(x, (int, np.integer)) and not isinstance(x, bool):
+        return int(x) & MASK64
+    if not isinstance(x, bytes):
+        x = str(x).encode()
+    return int.from_bytes(hashlib.blake2b(x, digest_size=8).digest(), "little")
+
+
+def hash64(x):
+    return _splitmix64_int(_key_to_int(x))
+
+
+def hash64_many(keys):
+    keys = np.asarray(keys)
+    if keys.dtype.kind in "iu":
+        return _splitmix64(keys.astype(np.uint64, copy=False))
+    ints = np.fromiter((_key_to_int(k) for k in keys.ravel()), dtype=np.uint64, count=keys.size)
+    return _splitmix64(ints)
+
+
+def _merge_sorted(a, b):
+    # два отсортированных массива: timsort находит обе серии и сливает их за линейное время
+    merged = np.concatenate([a, b])
+    merged.sort(kind="stable")
+    if len(merged) == 0:
+        return merged
+    return merged[np.concatenate([[True], merged[1:] != merged[:-1]])]
+
+
+def _merge_counted(a, ca, b, cb):
+    # то же для пар (отпечаток, счётчик): счётчики одинаковых отпечатков складываются
+    merged = np.concatenate([a, b])
+    counts = np.concatenate([ca, cb]).astype(np.uint64)
+    order = np.argsort(merged, kind="stable")
+    merged, counts = merged[order], counts[order]
+    if len(merged) == 0:
+        return merged, counts.astype(COUNTER_DTYPE)
+    starts = np.flatnonzero(np.concatenate([[True], merged[1:] != merged[:-1]]))
+    summed = np.minimum(np.add.reduceat(counts, starts), COUNTER_MAX).astype(COUNTER_DTYPE)
+    return merged[starts], summed
+
+
+class QuotientFilter:
+    def __init__(self, q, r, max_load=None, counting=False):
+        if not 1 <= q + r <= 64:
+            raise ValueError("q + r must be in 1..64")
+        # при заполнении выше max_load таблица удваивается: q+1, r-1 (None — фиксированный размер)
+        self.max_load = max_load
+        # counting: рядом с остатком хранится число его вставок (мультимножество отпечатков)
+        self.counting = counting
+        self._allocate(q, r)
+
+    def _allocate(self, q, r):
+        self.q = q                                  # число бит для quotient
+        self.r = r                                  # число бит для remainder
+        self.m = 1 << q                             # размер таблицы = 2^q
+        self.count = 0
+        # массивы для хранения остатка и трёх флагов
+        self.remainders      = np.zeros(self.m, dtype=np.uint64)
+        self.is_occupied     = np.zeros(self.m, dtype=bool)  # был ли занят канонический слот
+        self.is_continuation = np.zeros(self.m, dtype=bool)  # продолжение run’а
+        self.is_shifted      = np.zeros(self.m, dtype=bool)  # сдвинут ли remainder
+        self.counters = np.zeros(self.m, dtype=COUNTER_DTYPE) if self.counting else None
+        # rank-индекс: число occupied в каждом блоке из RANK_BLOCK слотов
+        self.occupied_blocks = np.zeros(-(-self.m // RANK_BLOCK), dtype=np.int64)
+        self._fingerprints = None                   # кеш отсортированных отпечатков для contains_many
+        self._counts = None                         # счётчики в порядке _fingerprints (режим counting)
+
+    def _hash(self, x):
+        return hash64(x)
+
+    def _decode(self, h):
+        # оставляем только p = q+r младших бит для quotient и remainder
+        p = self.q + self.r
+        h_trunc = h & ((1 << p) - 1)             # обрезаем до p бит
+        q = h_trunc >> self.r                    # старшие q бит → индекс регистра
+        r = h_trunc & ((1 << self.r) - 1)        # младшие r бит → остаток
+        return q, r
+
+    def _fingerprints_of(self, keys):
+        # p = q+r младших бит хеша; quotient — старшие q из них
+        return hash64_many(keys) & np.uint64((1 << (self.q + self.r)) - 1)
+
+    def _is_empty(self, i):
+        return not (self.is_occupied[i] or self.is_continuation[i] or self.is_shifted[i])
+
+    def _rank(self, start, end):
+        # число occupied в [start, end) без заворота: полные блоки из индекса, края — по битам
+        if end - start <= 2 * RANK_BLOCK:
+            return int(np.count_nonzero(self.is_occupied[start:end]))
+        first = -(-start // RANK_BLOCK)
+        last = end // RANK_BLOCK
+        return (
+            int(np.count_nonzero(self.is_occupied[start:first * RANK_BLOCK]))
+            + int(self.occupied_blocks[first:last].sum())
+            + int(np.count_nonzero(self.is_occupied[last * RANK_BLOCK:end]))
+        )
+
+    def rank(self, start, end):
+        # сколько занятых канонических слотов в циклическом отрезке [start, end)
+        if start <= end:
+            return self._rank(start, end)
+        return self._rank(start, self.m) + self._rank(0, end)
+
+    def _set_occupied(self, q):
+        if not self.is_occupied[q]:
+            self.is_occupied[q] = True
+            self.occupied_blocks[q // RANK_BLOCK] += 1
+
+    def _clear_occupied(self, q):
+        if self.is_occupied[q]:
+            self.is_occupied[q] = False
+            self.occupied_blocks[q // RANK_BLOCK] -= 1
+
+    def _find_cluster_start(self, idx):
+        # поиск начала кластера: двигаемся влево, пока видим сдвинутые элементы
+        i = idx
+        while self.is_shifted[i]:
+            i = (i - 1) % self.m
+        return i
+
+    def _find_run_start(self, q):
+        # k-й занятый канонический слот кластера владеет k-м run’ом кластера:
+        # k берём из rank-индекса и пропускаем k run’ов от начала кластера
+        b = self._find_cluster_start(q)
+        runs = self.rank(b, q)
+        s = b
+        for _ in range(runs):
+            s = (s + 1) % self.m
+            while self.is_continuation[s]:
+                s = (s + 1) % self.m
+        return s
+
+    def add(self, x):
+        h = self._hash(x)
+        if self.max_load is not None and self.count + 1 > self.max_load * self.m and self.r > 1:
+            self.resize(self.q + 1)
+        self._insert(*self._decode(h))
+
+    def _insert(self, q, r, n=1):
+        self._fingerprints = None
+        # если слот полностью свободен — просто вставляем и ставим occupied
+        if self._is_empty(q):
+            self._check_capacity()
+            self.remainders[q] = r
+            if self.counting:
+                self.counters[q] = min(n, COUNTER_MAX)
+            self._set_occupied(q)
+            self.count += 1
+            return
+
+        # иначе помечаем occupied и ищем, где начинается (или должен начаться) run;
+        # у нового run’а повтора быть не может, так что место проверяем до изменения флагов
+        run_exists = bool(self.is_occupied[q])
+        if not run_exists:
+            self._check_capacity()
+        self._set_occupied(q)
+        run_start = self._find_run_start(q)
+
+        # внутри run’а остатки отсортированы; повтор не вставляем (в counting — увеличиваем счётчик)
+        pos = run_start
+        if run_exists:
+            while True:
+                if self.remainders[pos] == r:
+                    if self.counting:
+                        self.counters[pos] = min(int(self.counters[pos]) + n, COUNTER_MAX)
+                    return
+                if self.remainders[pos] > r:
+                    break
+                pos = (pos + 1) % self.m
+                if not self.is_continuation[pos]:
+                    break
+
+        if run_exists:
+            self._check_capacity()
+        # вставляем на pos и сдвигаем вправо всё до ближайшей свободной ячейки;
+        # is_occupied принадлежит слоту, а не элементу, и не переносится
+        rem, cont = r, pos != run_start
+        cnt = min(n, COUNTER_MAX)
+        # новая голова существующего run’а: старая голова становится продолжением
+        bump_head = run_exists and pos == run_start
+        shifted = pos != q
+        i = pos
+        while True:
+            was_empty = self._is_empty(i)
+            rem, self.remainders[i] = self.remainders[i], rem
+            cont, self.is_continuation[i] = bool(self.is_continuation[i]), cont
+            if self.counting:
+                cnt, self.counters[i] = int(self.counters[i]), cnt
+            self.is_shifted[i] = shifted
+            if was_empty:
+                break
+            if bump_head:
+                cont, bump_head = True, False
+            shifted = True
+            i = (i + 1) % self.m
+        self.count += 1
+
+    def _check_capacity(self):
+        # один слот всегда пустой: иначе у полностью сдвинутой таблицы нет начала кластера
+        # и обход кластера не останавливается
+        if self.count >= self.m - 1:
+            raise ValueError("QuotientFilter is full")
+
+    def remove(self, x):
+        """Удаляет x; False, если такого отпечатка нет.
+
+        Удаляется отпечаток, а не ключ: без counting ключи с одинаковым отпечатком делят один слот,
+        и удаление одного из них убирает и остальные. Удалять можно только то, что добавлялось.
+        """
+        return self._delete(*self._decode(self._hash(x)))
+
+    def _delete(self, q, r):
+        pos = self._find(q, r)
+        if pos is None:
+            return False
+        self._fingerprints = None
+        if self.counting:
+            # залипший счётчик не уменьшаем: сколько было вставок на самом деле, уже неизвестно
+            if self.counters[pos] == COUNTER_MAX:
+                return True
+            if self.counters[pos] > 1:
+                self.counters[pos] -= 1
+                return True
+
+        run_start = self._find_run_start(q)
+        nxt = (pos + 1) % self.m
+        if pos == run_start and not self.is_continuation[nxt]:
+            self._clear_occupied(q)                 # это был единственный элемент run’а
+
+        # сдвигаем хвост кластера на слот влево; run_q — quotient run’а, которому принадлежит
+        # сдвигаемый элемент: на каждой новой голове run’а переходим к следующему occupied
+        run_q = q
+        head = pos == run_start
+        i = pos
+        while self.is_shifted[nxt]:
+            cont = bool(self.is_continuation[nxt])
+            if not cont:
+                run_q = (run_q + 1) % self.m
+                while not self.is_occupied[run_q]:
+                    run_q = (run_q + 1) % self.m
+            elif head:
+                cont = False                        # удалили голову: следующий элемент run’а становится головой
+            head = False
+            self.remainders[i] = self.remainders[nxt]
+            self.is_continuation[i] = cont
+            self.is_shifted[i] = i != run_q
+            if self.counting:
+                self.counters[i] = self.counters[nxt]
+            i, nxt = nxt, (nxt + 1) % self.m
+        # элемент, стоявший в своём каноническом слоте, и всё за ним остаются на месте
+        self.remainders[i] = 0
+        self.is_continuation[i] = False
+        self.is_shifted[i] = False
+        if self.counting:
+            self.counters[i] = 0
+        self.count -= 1
+        return True
+
+    def lookup(self, x):
+        return self._contains(*self._decode(self._hash(x)))
+
+    def _find(self, q, r):
+        # слот с остатком r в run’е q или None
+        if not self.is_occupied[q]:
+            return None
+        i = self._find_run_start(q)
+        while True:
+            if self.remainders[i] == r:
+                return i
+            i = (i + 1) % self.m
+            if not self.is_continuation[i]:
+                return None
+
+    def _contains(self, q, r):
+        return self._find(q, r) is not None
+
+    def multiplicity(self, x):
+        """Сколько раз добавлялся отпечаток x (режим counting); 0 — нет в фильтре."""
+        if not self.counting:
+            raise ValueError("multiplicity needs a counting filter")
+        pos = self._find(*self._decode(self._hash(x)))
+        return 0 if pos is None else int(self.counters[pos])
+
+    def __contains__(self, x):
+        return self.lookup(x)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def load_factor(self):
+        return self.count / self.m
+
+    def fingerprints(self):
+        """Все хранимые отпечатки (quotient << r | remainder) по возрастанию, без исходных ключей."""
+        if self._fingerprints is not None:
+            return self._fingerprints
+        filled = self.is_occupied | self.is_continuation | self.is_shifted
+        starts = np.flatnonzero(filled & ~self.is_shifted)
+        if len(starts) == 0:
+            self._fingerprints = np.zeros(0, dtype=np.uint64)
+            self._counts = np.zeros(0, dtype=COUNTER_DTYPE) if self.counting else None
+            return self._fingerprints
+        # Смотрим на таблицу с начала какого-нибудь кластера: тогда k-я голова run’а
+        # соответствует k-му занятому каноническому слоту, в том числе через заворот
+        c0 = starts[0]
+        order = np.roll(np.arange(self.m), -c0)
+        slots = order[filled[order]]
+        heads = ~self.is_continuation[slots]
+        quotients = order[self.is_occupied[order]]
+        run_of_slot = np.cumsum(heads) - 1
+        fp = (quotients[run_of_slot].astype(np.uint64) << np.uint64(self.r)) | self.remainders[slots]
+        order = np.argsort(fp, kind="stable")
+        self._counts = self.counters[slots][order] if self.counting else None
+        self._fingerprints = fp[order]
+        return self._fingerprints
+
+    def fingerprint_counts(self):
+        """Отпечатки по возрастанию и сколько раз каждый добавлен (без counting — единицы)."""
+        fp = self.fingerprints()
+        if self.counting:
+            return fp, self._counts
+        return fp, np.ones(len(fp), dtype=COUNTER_DTYPE)
+
+    def _layout(self, fp):
+        # Раскладка отсортированных уникальных отпечатков без вставок по одному:
+        # без заворота j-й элемент стоит в pos_j = j + max_{k<=j}(q_k - k).
+        # Элементы, вылезшие за m, уходят в начало таблицы подряд (слоты 0..K-1) и
+        # подпирают остальные; K растёт, пока раскладка не перестанет вылезать
+        n = len(fp)
+        quotients = (fp >> np.uint64(self.r)).astype(np.int64)
+        j = np.arange(n, dtype=np.int64)
+        shift = np.maximum.accumulate(quotients - j)
+        wrapped = 0
+        while True:
+            head = n - wrapped
+            pos = j[:head] + np.maximum(shift[:head], wrapped)
+            extra = int(np.count_nonzero(pos >= self.m))
+            if extra == 0:
+                break
+            wrapped += extra
+        return quotients, np.concatenate([pos, np.arange(wrapped, dtype=np.int64)])
+
+    @staticmethod
+    def _check_fits(n, q):
+        # до _allocate: при ошибке таблица и её содержимое должны остаться прежними
+        if n > (1 << q) - 1:
+            raise ValueError("QuotientFilter is full")
+
+    def _rebuild(self, fp, counts=None):
+        self._check_fits(len(fp), self.q)
+        quotients, pos = self._layout(fp)
+        self.remainders[:] = 0
+        self.is_occupied[:] = False
+        self.is_continuation[:] = False
+        self.is_shifted[:] = False
+        self.remainders[pos] = fp & np.uint64((1 << self.r) - 1)
+        self.is_occupied[quotients] = True
+        self.is_continuation[pos[1:]] = quotients[1:] == quotients[:-1]
+        self.is_shifted[pos] = pos != quotients
+        if self.counting:
+            if counts is None:
+                counts = np.ones(len(fp), dtype=COUNTER_DTYPE)
+            self.counters[:] = 0
+            self.counters[pos] = counts
+            self._counts = counts
+        self._reindex()
+        self.count = len(fp)
+        self._fingerprints = fp
+
+    def _reindex(self):
+        padded = np.zeros(len(self.occupied_blocks) * RANK_BLOCK, dtype=bool)
+        padded[:self.m] = self.is_occupied
+        self.occupied_blocks[:] = padded.reshape(-1, RANK_BLOCK).sum(axis=1)
+
+    def add_many(self, keys):
+        """Вставка массива ключей: хеш векторно, затем либо по одному, либо пересборка таблицы."""
+        if self.counting:
+            fp, counts = np.unique(self._fingerprints_of(keys), return_counts=True)
+        else:
+            fp, counts = np.unique(self._fingerprints_of(keys)), None
+        fits = self.max_load is None or self.count + len(fp) <= self.max_load * self.m
+        if len(fp) < self.m * BULK_REBUILD_RATIO and fits:
+            r_mask = (1 << self.r) - 1
+            for i, f in enumerate(fp.tolist()):
+                self._insert(f >> self.r, f & r_mask, 1 if counts is None else int(counts[i]))
+            return
+        if self.counting:
+            self._rebuild_grown(*_merge_counted(*self.fingerprint_counts(), fp, counts))
+        else:
+            self._rebuild_grown(_merge_sorted(self.fingerprints(), fp))
+
+    def _rebuild_grown(self, fp, counts=None, q=None):
+        # пересборка с ростом таблицы (не меньше 2^q слотов), пока новый набор не уложится в max_load
+        q = self.q if q is None else q
+        if self.max_load is not None:
+            while len(fp) > self.max_load * (1 << q) and self.q + self.r - q > 1:
+                q += 1
+        self._check_fits(len(fp), q)
+        if q != self.q:
+            self._allocate(q, self.q + self.r - q)
+        self._rebuild(fp, counts)
+
+    def resize(self, q):
+        """Перестраивает таблицу под 2^q слотов по хранимым отпечаткам, исходные ключи не нужны.
+
+        Длина отпечатка p = q + r не меняется: при росте бит остатка переходит в quotient,
+        поэтому вероятность ложного срабатывания на элемент растёт вдвое с каждым удвоением.
+        """
+        p = self.q + self.r
+        if not 1 <= q < p:
+            raise ValueError(f"q must be in 1..{p - 1} for {p}-bit fingerprints")
+        fp, counts = self.fingerprint_counts()
+        self._check_fits(len(fp), q)
+        self._allocate(q, p - q)
+        self._rebuild(fp, counts if self.counting else None)
+
+    def merge(self, other):
+        """Добавляет все отпечатки другого фильтра (например, шарда, собранного параллельно).
+
+        Отпечатки обоих фильтров уже отсортированы, так что объединение — один линейный проход.
+        """
+        if other.q + other.r != self.q + self.r:
+            raise ValueError("filters must use the same fingerprint length q + r")
+        if self.counting:
+            fp, counts = _merge_counted(*self.fingerprint_counts(), *other.fingerprint_counts())
+        else:
+            fp, counts = _merge_sorted(self.fingerprints(), other.fingerprints()), None
+        self._rebuild_grown(fp, counts, max(self.q, other.q))
+        return self
+
+    def contains_many(self, keys):
+        """Проверка массива ключей бинарным поиском по отсортированным отпечаткам."""
+        fp = self._fingerprints_of(keys)
+        stored = self.fingerprints()
+        if len(stored) == 0:
+            return np.zeros(fp.shape, dtype=bool)
+        idx = np.searchsorted(stored, fp)
+        return stored[np.minimum(idx, len(stored) - 1)] == fp
+
+    @property
+    def nbytes(self):
+        return (self.remainders.nbytes + self.is_occupied.nbytes + self.is_continuation.nbytes
+                + self.is_shifted.nbytes + self.occupied_blocks.nbytes
+                + (self.counters.nbytes if self.counting else 0))
+
+    def pack(self):
+        # упакованный фильтр только отвечает на lookup: счётчики режима counting в него не попадают
+        return PackedQuotientFilter.from_filter(self)
+
+    def save(self, path):
+        self.pack().save(path)
+
+    @classmethod
+    def load(cls, path):
+        # изменяемая копия; для чтения без копирования — PackedQuotientFilter.load
+        return PackedQuotientFilter.load(path, mmap=False).unpack()
+
+
+class PackedQuotientFilter:
+    """Фильтр только для чтения: слот — ровно r+3 бит подряд в массиве uint64.
+
+    Биты слота: 0 — occupied, 1 — continuation, 2 — shifted, 3.. — остаток.
+    Слоты идут сплошным потоком бит (младший бит слова первым) и могут переходить
+    через границу слова; в конце одно слово запаса, чтобы чтение не выходило за массив.
+    """
+
+    def __init__(self, q, r, count, words):
+        self.q = q
+        self.r = r
+        self.m = 1 << q
+        self.width = r + 3
+        self.count = count
+        self.words = words
+        self._slot_mask = (1 << self.width) - 1
+        # memoryview поверх тех же байт отдаёт слова сразу как int: индексирование ndarray/np.memmap
+        # в горячем цикле заметно дороже. Формат файла '<u8', 'Q' — родной порядок (little-endian на x86/ARM)
+        self._words = memoryview(words).cast("B").cast("Q")
+
+    @staticmethod
+    def _words_for(m, width):
+        return -(-m * width // 64) + 1
+
+    @classmethod
+    def from_filter(cls, qf):
+        if qf.r + 3 > 64:
+            raise ValueError("r + 3 must fit into 64 bits")
+        width = qf.r + 3
+        bits = np.zeros((qf.m, width), dtype=bool)
+        bits[:, 0] = qf.is_occupied
+        bits[:, 1] = qf.is_continuation
+        bits[:, 2] = qf.is_shifted
+        # остаток раскладываем по битам: столбец 3 + k — k-й бит
+        bits[:, 3:] = (qf.remainders[:, None] >> np.arange(qf.r, dtype=np.uint64)) & np.uint64(1)
+        packed = np.packbits(bits.ravel(), bitorder="little")
+        words = np.zeros(cls._words_for(qf.m, width), dtype="<u8")
+        words.view(np.uint8)[:len(packed)] = packed
+        return cls(qf.q, qf.r, qf.count, words)
+
+    def unpack(self):
+        qf = QuotientFilter(self.q, self.r)
+        bits = np.unpackbits(
+            np.asarray(self.words).view(np.uint8), count=self.m * self.width, bitorder="little"
+        ).reshape(self.m, self.width).astype(bool)
+        qf.is_occupied[:] = bits[:, 0]
+        qf.is_continuation[:] = bits[:, 1]
+        qf.is_shifted[:] = bits[:, 2]
+        qf.remainders[:] = (bits[:, 3:].astype(np.uint64) << np.arange(self.r, dtype=np.uint64)).sum(axis=1)
+        qf._reindex()
+        qf.count = self.count
+        return qf
+
+    def save(self, path):
+        header = PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, self.q, self.r, self.count)
+        with open(path, "wb") as f:
+            f.write(header.ljust(PACKED_HEADER_SIZE, b"\0"))
+            f.write(np.asarray(self.words, dtype="<u8").tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(path, "rb") as f:
+            magic, version, q, r, count = PACKED_HEADER.unpack(f.read(PACKED_HEADER.size))
+        if magic != PACKED_MAGIC or version != PACKED_VERSION:
+            raise ValueError(f"{path} is not a packed quotient filter")
+        n_words = cls._words_for(1 << q, r + 3)
+        if mmap:
+            words = np.memmap(path, dtype="<u8", mode="r", offset=PACKED_HEADER_SIZE, shape=(n_words,))
+        else:
+            words = np.fromfile(path, dtype="<u8", count=n_words, offset=PACKED_HEADER_SIZE)
+        return cls(q, r, count, words)
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def _slot(self, i):
+        offset = i * self.width
+        word, shift = offset >> 6, offset & 63
+        value = self._words[word] >> shift
+        if shift + self.width > 64:
+            value |= self._words[word + 1] << (64 - shift)
+        return value & self._slot_mask
+
+    def _find_run_start(self, q):
+        # как в QuotientFilter, но по упакованным словам и без rank-индекса: кластер короткий
+        b = q
+        while self._slot(b) & 4:
+            b = (b - 1) % self.m
+        s = b
+        while b != q:
+            s = (s + 1) % self.m
+            while self._slot(s) & 2:
+                s = (s + 1) % self.m
+            b = (b + 1) % self.m
+            while not self._slot(b) & 1:
+                b = (b + 1) % self.m
+        return s
+
+    def lookup(self, x):
+        h = hash64(x) & ((1 << (self.q + self.r)) - 1)
+        q, r = h >> self.r, h & ((1 << self.r) - 1)
+        if not self._slot(q) & 1:
+            return False
+        i = self._find_run_start(q)
+        while True:
+            if self._slot(i) >> 3 == r:
+                return True
+            i = (i + 1) % self.m
+            if not self._slot(i) & 2:
+                return False
+
+    def __contains__(self, x):
+        return self.lookup(x)
+
+    def __len__(self):
+        return self.count
+
+    def contains_many(self, keys):
+        return np.fromiter((self.lookup(k) for k in np.asarray(keys).tolist()), dtype=bool, count=len(keys))
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from common.quotient_filter import QuotientFilter
+
+logger = logging.getLogger(__name__)
+
+# Отозванные access-токены по jti; таблица общая для всех сервисов (миграция 0006)
+revoked_tokens = Table(
+    "revoked_tokens", MetaData(),
+    Column("id", BigInteger, primary_key=True),
+    Column("jti", String(36), unique=True, nullable=False),
+    Column("user_id", Integer, nullable=True),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+    Column("revoked_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "2"))
+REVOCATION_BUCKET_SECONDS = int(os.getenv("REVOCATION_BUCKET_SECONDS", "60"))
+REVOCATION_FILTER_Q = int(os.getenv("REVOCATION_FILTER_Q", "14"))
+REVOCATION_FILTER_R = int(os.getenv("REVOCATION_FILTER_R", "16"))
+# Заполненный сверх этого фильтр перестаёт принимать вставки и отвечает «возможно» на всё
+REVOCATION_FILTER_MAX_LOAD = float(os.getenv("REVOCATION_FILTER_MAX_LOAD", "0.9"))
+SYNC_OVERLAP = 100
+
+
+class RevocationFilter:
+    """Отозванные jti, разложенные по корзинам времени exp.
+
+    Токен ищется только в корзине своего exp, а корзина целиком выбрасывается,
+    когда все её токены истекли, — удалять из quotient filter по одному не нужно.
+    """
+
+    def __init__(self, q=REVOCATION_FILTER_Q, r=REVOCATION_FILTER_R, bucket_seconds=REVOCATION_BUCKET_SECONDS):
+        self.q = q
+        self.r = r
+        self.bucket_seconds = bucket_seconds
+        self.buckets = {}
+        self.saturated = set()
+
+    def _bucket(self, exp: int) -> int:
+        return int(exp) // self.bucket_seconds
+
+    def add(self, jti: str, exp: int):
+        bucket = self._bucket(exp)
+        if bucket in self.saturated:
+            return
+        qf = self.buckets.get(bucket)
+        if qf is None:
+            qf = self.buckets[bucket] = QuotientFilter(self.q, self.r)
+        if qf.load_factor >= REVOCATION_FILTER_MAX_LOAD:
+            self.saturated.add(bucket)
+            del self.buckets[bucket]
+            return
+        qf.add(jti)
+
+    def might_contain(self, jti: str, exp: int) -> bool:
+        bucket = self._bucket(exp)
+        if bucket in self.saturated:
+            return True
+        qf = self.buckets.get(bucket)
+        return qf is not None and jti in qf
+
+    def expire(self, now: float = None):
+        # корзина b покрывает exp из [b * bucket_seconds, (b + 1) * bucket_seconds)
+        current = self._bucket(time.time() if now is None else now)
+        for bucket in [b for b in self.buckets if b < current]:
+            del self.buckets[bucket]
+        self.saturated = {b for b in self.saturated if b >= current}
+
+    def __len__(self):
+        return sum(len(qf) for qf in self.buckets.values())
+
+
+class RevocationList:
+    """Проверка отзыва access-токенов: фильтр в памяти, БД — только при попадании в фильтр."""
+
+    def __init__(self, sessionmaker):
+        self.sessionmaker = sessionmaker
+        self.filter = RevocationFilter()
+        self.last_id = 0
+        self._task = None
+        self._stats = {"checks": 0, "filter_hits": 0, "revoked_hits": 0, "sync_errors": 0}
+
+    async def rebuild(self):
+        # при старте: все ещё не истёкшие отзывы
+        fresh = RevocationFilter()
+        async with self.sessionmaker() as db:
+            max_id = await db.scalar(select(func.max(revoked_tokens.c.id))) or 0
+            result = await db.stream(
+                select(revoked_tokens.c.jti, revoked_tokens.c.expires_at)
+                .where(revoked_tokens.c.id <= max_id, revoked_tokens.c.expires_at > func.now())
+            )
+            async for row in result:
+                fresh.add(row.jti, row.expires_at.timestamp())
+        self.filter = fresh
+        self.last_id = max_id
+
+    async def sync(self):
+        # Новые отзывы из других процессов и сервисов. Окно назад на SYNC_OVERLAP id:
+        # транзакция с меньшим id может закоммититься позже соседней; повторная вставка в фильтр безвредна
+        async with self.sessionmaker() as db:
+            result = await db.execute(
+                select(revoked_tokens.c.id, revoked_tokens.c.jti, revoked_tokens.c.expires_at)
+                .where(revoked_tokens.c.id > self.last_id - SYNC_OVERLAP)
+                .order_by(revoked_tokens.c.id)
+            )
+            for row in result:
+                self.filter.add(row.jti, row.expires_at.timestamp())
+                self.last_id = max(self.last_id, row.id)
+        self.filter.expire()
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(REVOCATION_SYNC_INTERVAL)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._stats["sync_errors"] += 1
+                logger.exception("Revocation list sync failed")
+
+    async def start(self):
+        try:
+            await self.rebuild()
+        except Exception:
+            # без БД сервис всё равно поднимается; фильтр догонит синхронизация
+            self._stats["sync_errors"] += 1
+            logger.exception("Revocation list rebuild failed")
+        if REVOCATION_SYNC_INTERVAL > 0 and self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def revoke(self, db, jti: str, exp: int, user_id: int = None):
+        await db.execute(
+            pg_insert(revoked_tokens)
+            .values(jti=jti, user_id=user_id, expires_at=datetime.fromtimestamp(exp, timezone.utc))
+            .on_conflict_do_nothing(index_elements=["jti"])
+        )
+        await db.commit()
+        self.filter.add(jti, exp)
+
+    async def is_revoked(self, payload: dict) -> bool:
+        jti, exp = payload.get("jti"), payload.get("exp")
+        if jti is None or exp is None:
+            return False
+        self._stats["checks"] += 1
+        if not self.filter.might_contain(jti, exp):
+            return False
+        self._stats["filter_hits"] += 1
+        async with self.sessionmaker() as db:
+            found = await db.scalar(select(revoked_tokens.c.id).where(revoked_tokens.c.jti == jti))
+        if found is not None:
+            self._stats["revoked_hits"] += 1
+        return found is not None
+
+    async def check(self, payload: dict):
+        if await self.is_revoked(payload):
+            raise HTTPException(status_code=401, detail="Token revoked")
+
+    def stats(self):
+        return dict(
+            self._stats,
+            filter_entries=len(self.filter),
+            filter_buckets=len(self.filter.buckets),
+            saturated_buckets=len(self.filter.saturated),
+            last_id=self.last_id,
+        )
@@ -0,0 +1,81 @@
+"""
+Боевой запуск сервиса: несколько процессов uvicorn, uvloop/httptools, backlog, keep-alive
+и плавная остановка. Запускается из каталога сервиса:
+
+    python -m common.server main:app --port 8000
+
+Все параметры можно задать переменными окружения (WEB_CONCURRENCY, PORT, ...), флаги их перекрывают.
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+
+import uvicorn
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# по умолчанию процесс на ядро; каждый держит свой пул БД — см. DB_POOL_SIZE в README
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+# дольше, чем keepalive_timeout у nginx к upstream: соединение закрывает прокси, а не сервис посреди запроса
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "75"))
+# сколько ждать незавершённые запросы после SIGTERM; stop_grace_period в compose должен быть больше
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+LIMIT_CONCURRENCY = int(os.getenv("LIMIT_CONCURRENCY", "0")) or None
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "*")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+# строка лога на каждый запрос заметно дорога под нагрузкой; задержки и статусы есть в /metrics
+ACCESS_LOG = os.getenv("ACCESS_LOG", "false").lower() in ("1", "true", "yes")
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def prepare_multiprocess_metrics():
+    # С несколькими процессами каждый считает метрики отдельно; prometheus_client в multiprocess-режиме
+    # пишет их в общий каталог, а /metrics собирает по всем. Каталог чистим до старта процессов
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запуск сервиса под uvicorn в несколько процессов")
+    parser.add_argument("app", help="приложение в виде module:attr, например main:app")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    parser.add_argument("--backlog", type=int, default=BACKLOG)
+    parser.add_argument("--keepalive-timeout", type=int, default=KEEPALIVE_TIMEOUT)
+    parser.add_argument("--graceful-timeout", type=int, default=GRACEFUL_TIMEOUT)
+    parser.add_argument("--limit-concurrency", type=int, default=LIMIT_CONCURRENCY)
+    parser.add_argument("--log-level", default=LOG_LEVEL)
+    args = parser.parse_args()
+
+    # дочерние процессы наследуют окружение: по нему сервисы делят ядра (пул bcrypt) и включают общие метрики
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    prepare_multiprocess_metrics()
+    uvicorn.run(
+        args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keepalive_timeout,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_concurrency=args.limit_concurrency,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        log_level=args.log_level,
+        access_log=ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import sys
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from common.quotient_filter import COUNTER_DTYPE, RANK_BLOCK, QuotientFilter
+
+# заголовок сегмента, слова uint64: seq, q, r, counting, count
+HEADER_WORDS = 8
+SEQ, Q, R, COUNTING, COUNT = range(5)
+
+
+def _fields(m, counting):
+    # массивы сегмента по порядку; длины кратны 8 байтам, так что каждый следующий выровнен
+    fields = [
+        ("remainders", np.uint64, m),
+        ("is_occupied", np.bool_, m),
+        ("is_continuation", np.bool_, m),
+        ("is_shifted", np.bool_, m),
+        ("occupied_blocks", np.int64, -(-m // RANK_BLOCK)),
+    ]
+    if counting:
+        fields.append(("counters", COUNTER_DTYPE, m))
+    return fields
+
+
+def _nbytes(dtype, length):
+    return -(-np.dtype(dtype).itemsize * length // 8) * 8
+
+
+def _attach(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # До 3.13 подключение тоже регистрирует сегмент в resource_tracker. Процессы из multiprocessing
+    # делят tracker создателя, и повторная регистрация безвредна; а собственный tracker удалил бы
+    # сегмент при выходе читателя — из него регистрацию убираем
+    own_tracker = resource_tracker._resource_tracker._fd is None
+    shm = shared_memory.SharedMemory(name=name)
+    if own_tracker:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class SharedQuotientFilter(QuotientFilter):
+    """QuotientFilter, чьи массивы лежат в multiprocessing.shared_memory.
+
+    Пишет только процесс, создавший сегмент; остальные подключаются через attach(name)
+    и читают без блокировок по seqlock: писатель делает seq нечётным на время изменения
+    и снова чётным после, читатель повторяет поиск, если seq был нечётным или изменился.
+    Размер сегмента фиксирован: авторасширения и resize нет, readers держат старые массивы.
+    """
+
+    def __init__(self, q, r, counting=False, name=None):
+        self._shm = None
+        self._name = name
+        self.writer = True
+        super().__init__(q, r, counting=counting)
+
+    @classmethod
+    def attach(cls, name):
+        self = cls.__new__(cls)
+        self._shm = _attach(name)
+        self.writer = False
+        self.max_load = None
+        header = np.ndarray(HEADER_WORDS, dtype=np.uint64, buffer=self._shm.buf)
+        self.counting = bool(header[COUNTING])
+        self._map(int(header[Q]), int(header[R]))
+        return self
+
+    def __reduce__(self):
+        # в другой процесс передаётся только имя сегмента, там фильтр подключается читателем
+        return SharedQuotientFilter.attach, (self.name,)
+
+    def _allocate(self, q, r):
+        if self._shm is not None:
+            raise ValueError("SharedQuotientFilter has a fixed size")
+        size = 8 * HEADER_WORDS + sum(_nbytes(d, n) for _, d, n in _fields(1 << q, self.counting))
+        self._shm = shared_memory.SharedMemory(name=self._name, create=True, size=size)
+        self._map(q, r)
+        self._header[:] = 0
+        self._header[Q], self._header[R], self._header[COUNTING] = q, r, int(self.counting)
+
+    def _map(self, q, r):
+        self.q = q
+        self.r = r
+        self.m = 1 << q
+        self._header = np.ndarray(HEADER_WORDS, dtype=np.uint64, buffer=self._shm.buf)
+        offset = 8 * HEADER_WORDS
+        self.counters = None
+        for field, dtype, length in _fields(self.m, self.counting):
+            setattr(self, field, np.ndarray(length, dtype=dtype, buffer=self._shm.buf, offset=offset))
+            offset += _nbytes(dtype, length)
+        self._fingerprints = None
+        self._counts = None
+        self._fingerprints_seq = None
+        self._seen_seq = None
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def count(self):
+        return int(self._header[COUNT])
+
+    @count.setter
+    def count(self, value):
+        self._header[COUNT] = value
+
+    @property
+    def generation(self):
+        # растёт на 2 с каждой завершённой записью
+        return int(self._header[SEQ])
+
+    @contextmanager
+    def _writing(self):
+        if not self.writer:
+            raise ValueError("only the process that created the filter may modify it")
+        self._header[SEQ] += 1
+        try:
+            yield
+        finally:
+            self._header[SEQ] += 1
+
+    def _read(self, fn, *args):
+        if self.writer:
+            return fn(*args)
+        while True:
+            seq = int(self._header[SEQ])
+            if seq & 1:
+                time.sleep(0)
+                continue
+            try:
+                result = fn(*args)
+            except (IndexError, ValueError):
+                # посреди записи массивы могут быть несогласованы; вне записи ошибка настоящая
+                if int(self._header[SEQ]) == seq:
+                    raise
+                continue
+            if int(self._header[SEQ]) == seq:
+                self._seen_seq = seq
+                return result
+
+    def add(self, x):
+        with self._writing():
+            super().add(x)
+
+    def add_many(self, keys):
+        with self._writing():
+            super().add_many(keys)
+
+    def remove(self, x):
+        with self._writing():
+            return super().remove(x)
+
+    def merge(self, other):
+        with self._writing():
+            return super().merge(other)
+
+    def resize(self, q):
+        raise ValueError("SharedQuotientFilter has a fixed size")
+
+    def lookup(self, x):
+        return self._read(self._contains, *self._decode(self._hash(x)))
+
+    def multiplicity(self, x):
+        return self._read(super().multiplicity, x)
+
+    def _load_fingerprints(self):
+        self._fingerprints = None
+        return super().fingerprints(), self._counts
+
+    def fingerprints(self):
+        if self.writer:
+            return super().fingerprints()
+        # у читателя кеш отпечатков живёт, пока не сменилось поколение сегмента
+        if self._fingerprints is None or self._fingerprints_seq != int(self._header[SEQ]):
+            fp, counts = self._read(self._load_fingerprints)
+            self._fingerprints, self._counts, self._fingerprints_seq = fp, counts, self._seen_seq
+        return self._fingerprints
+
+    def close(self):
+        # numpy-представления держат буфер сегмента: без них close() падает с BufferError
+        self._header = self.remainders = self.is_occupied = self.is_continuation = None
+        self.is_shifted = self.occupied_blocks = self.counters = None
+        self._shm.close()
+
+    def unlink(self):
+        if self.writer:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
@@ -0,0 +1,25 @@
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SERVICES = ("auth_service", "user_service", "product_service", "app")
+
+
+def import_service(service, *names):
+    """Импортирует модули сервиса так, как их видит сам сервис (from config import ...).
+
+    У сервисов одинаковые имена модулей (config, models, ...), поэтому перед импортом
+    из sys.modules выгружаются плоские модули, загруженные из других сервисов.
+    """
+    prefixes = tuple(os.path.join(ROOT, s) + os.sep for s in SERVICES)
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None) or ""
+        if "." not in name and path.startswith(prefixes):
+            del sys.modules[name]
+    service_path = os.path.join(ROOT, service)
+    if service_path in sys.path:
+        sys.path.remove(service_path)
+    sys.path.insert(0, service_path)
+    modules = [importlib.import_module(name) for name in names]
+    return modules[0] if len(modules) == 1 else modules
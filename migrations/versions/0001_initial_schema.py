@@ -0,0 +1,52 @@
+"""initial schema (users, refresh_tokens, products)
+
+Совпадает с SQL из README. Для уже созданной вручную БД: `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("username", sa.String(150), unique=True),
+        sa.Column("password_hash", sa.String(255)),
+        sa.Column("role", sa.String(20), nullable=False, server_default="user"),
+        sa.Column("vk_id", sa.String(50), unique=True),
+        sa.Column("email", sa.String(255)),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.current_timestamp()),
+    )
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE")),
+        sa.Column("token", sa.String(512), unique=True, nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+        sa.Column("revoked", sa.Boolean, server_default=sa.false()),
+    )
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.String(1024)),
+        sa.Column("price", sa.Float, nullable=False),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.current_timestamp()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("products")
+    op.drop_table("refresh_tokens")
+    op.drop_table("users")
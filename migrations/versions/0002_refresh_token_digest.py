@@ -0,0 +1,34 @@
+"""store refresh tokens by sha256 digest
+
+Вместо JWT целиком (varchar(512) + уникальный индекс) храним 32-байтный sha256.
+Существующие строки пересчитываются на стороне БД, сами токены для клиентов не меняются.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("refresh_tokens", sa.Column("token_hash", sa.LargeBinary(32)))
+    op.execute("UPDATE refresh_tokens SET token_hash = sha256(convert_to(token, 'UTF8'))")
+    op.alter_column("refresh_tokens", "token_hash", nullable=False)
+    op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True)
+    op.drop_column("refresh_tokens", "token")
+
+
+def downgrade() -> None:
+    # из дайджеста токен не восстановить: старые refresh-токены становятся недействительными
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_index("ix_refresh_tokens_token_hash", table_name="refresh_tokens")
+    op.drop_column("refresh_tokens", "token_hash")
+    op.add_column("refresh_tokens", sa.Column("token", sa.String(512), unique=True, nullable=False))
@@ -0,0 +1,31 @@
+"""indexes for refresh token purge
+
+Фоновая очистка выбирает строки по `revoked OR expires_at < now()`:
+btree по expires_at и частичный индекс по отозванным дают BitmapOr вместо seq scan.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"])
+    op.create_index(
+        "ix_refresh_tokens_revoked", "refresh_tokens", ["id"],
+        postgresql_where=sa.text("revoked"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_refresh_tokens_revoked", table_name="refresh_tokens")
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")
@@ -0,0 +1,36 @@
+"""product search: tsvector, trigram and price indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "ALTER TABLE products ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))) STORED"
+    )
+    op.create_index("ix_products_search_vector", "products", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_products_name_trgm", "products", ["name"],
+        postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index("ix_products_price", "products", ["price"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_price", table_name="products")
+    op.drop_index("ix_products_name_trgm", table_name="products")
+    op.drop_index("ix_products_search_vector", table_name="products")
+    op.drop_column("products", "search_vector")
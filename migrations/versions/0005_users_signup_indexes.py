@@ -0,0 +1,28 @@
+"""indexes for signup: admin probe and email lookup
+
+Проверка «есть ли admin» до первого admin'а и проверка email в user_service
+шли полным сканированием users.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_admin", "users", ["id"], postgresql_where=sa.text("role = 'admin'"))
+    op.create_index("ix_users_email", "users", ["email"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_admin", table_name="users")
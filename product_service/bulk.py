@@ -0,0 +1,112 @@
+import asyncio
+import csv
+import json
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from schemas import ProductCreate
+from config import BULK_CHUNK_SIZE, BULK_MAX_ERRORS_PER_CHUNK
+
+COLUMNS = ["name", "description", "price"]
+EXPORT_QUERY = "SELECT id, name, description, price, created_at FROM products ORDER BY id"
+
+async def iter_lines(request):
+    # Тело читается потоком: в памяти не больше одного сетевого чанка и хвоста строки
+    tail = b""
+    async for chunk in request.stream():
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line
+    if tail:
+        yield tail
+
+def _parse_line(raw_line: bytes, fmt: str, header):
+    line = raw_line.decode("utf-8")
+    if fmt == "ndjson":
+        return json.loads(line)
+    # одна запись CSV — одна строка: многострочные значения в кавычках не поддерживаются
+    row = next(csv.reader([line]))
+    if len(row) != len(header):
+        raise ValueError(f"expected {len(header)} columns, got {len(row)}")
+    return {key: value or None for key, value in zip(header, row)}
+
+async def _copy_chunk(db: AsyncSession, records: list):
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table("products", records=records, columns=COLUMNS)
+    await db.commit()
+
+async def _load_chunk(db: AsyncSession, number: int, lines: list, fmt: str, header):
+    records, errors = [], []
+    for line_no, line in lines:
+        try:
+            product = ProductCreate.model_validate(_parse_line(line, fmt, header))
+        except (ValueError, ValidationError) as e:
+            if len(errors) < BULK_MAX_ERRORS_PER_CHUNK:
+                errors.append({"line": line_no, "error": str(e)})
+            continue
+        records.append((product.name, product.description, product.price))
+    if records:
+        await _copy_chunk(db, records)
+    return {"chunk": number, "rows": len(lines), "inserted": len(records), "rejected": len(lines) - len(records), "errors": errors}
+
+async def import_products(db: AsyncSession, lines, fmt: str):
+    # Загрузка по BULK_CHUNK_SIZE строк: каждый чанк — один COPY и отдельный commit,
+    # невалидные строки пропускаются и попадают в отчёт своего чанка
+    report = {"inserted": 0, "rejected": 0, "chunks": []}
+    header = None
+    chunk = []
+    line_no = 0
+
+    async def flush():
+        result = await _load_chunk(db, len(report["chunks"]) + 1, chunk, fmt, header)
+        report["inserted"] += result["inserted"]
+        report["rejected"] += result["rejected"]
+        report["chunks"].append(result)
+        chunk.clear()
+
+    async for line in lines:
+        line_no += 1
+        line = line.strip()
+        if not line:
+            continue
+        if fmt == "csv" and header is None:
+            header = next(csv.reader([line.decode("utf-8-sig")]))
+            continue
+        chunk.append((line_no, line))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+    return report
+
+async def export_products_csv():
+    # COPY ... TO STDOUT отдаёт данные чанками в write(); очередь с ограничением
+    # держит backpressure между Postgres и медленным клиентом
+    queue = asyncio.Queue(maxsize=16)
+
+    async def write(data: bytes):
+        await queue.put(data)
+
+    async with AsyncSessionLocal() as db:
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+
+        async def run_copy():
+            try:
+                await raw.driver_connection.copy_from_query(EXPORT_QUERY, output=write, format="csv", header=True)
+            finally:
+                await queue.put(None)
+
+        task = asyncio.create_task(run_copy())
+        try:
+            while True:
+                data = await queue.get()
+                if data is None:
+                    break
+                yield data
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
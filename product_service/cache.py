@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from config import PRODUCT_CACHE_ENABLED, PRODUCT_CACHE_TTL, PRODUCT_CACHE_SIZE, PRODUCT_LIST_CACHE_SIZE
+
+class TTLCache:
+    """LRU с TTL на запись. generation растёт при каждой инвалидации: значение, прочитанное
+    из БД до инвалидации, не попадёт в кеш после неё (put с устаревшим generation игнорируется)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, generation: int):
+        if generation != self.generation or self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+# Кеш локален для процесса: при нескольких воркерах изменения в другом воркере
+# видны здесь не позже чем через PRODUCT_CACHE_TTL
+product_cache = TTLCache(PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL)
+product_list_cache = TTLCache(PRODUCT_LIST_CACHE_SIZE, PRODUCT_CACHE_TTL)
+
+def cache_enabled(request: Request, response: Response) -> bool:
+    # Cache-Control: no-cache в запросе — прочитать из БД в обход кеша (для отладки)
+    if not PRODUCT_CACHE_ENABLED:
+        return False
+    if "no-cache" in request.headers.get("cache-control", ""):
+        response.headers["X-Cache"] = "BYPASS"
+        return False
+    return True
+
+def invalidate_product(product_id: int = None):
+    if product_id is not None:
+        product_cache.invalidate(product_id)
+    product_list_cache.clear()
+
+def cache_stats():
+    return {"product": product_cache.stats(), "product_list": product_list_cache.stats()}
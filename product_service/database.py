@@ -1,14 +1,7 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from common.database import Database
 from config import DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL, future=True, echo=True)
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
-
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
+database = Database(DATABASE_URL)
+engine = database.engine
+AsyncSessionLocal = database.sessionmaker
+get_db = database.get_db
@@ -1,36 +1,135 @@
-from fastapi import FastAPI, Depends, HTTPException
+from typing import Optional, Literal
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from database import get_db
+from database import get_db, database
 from models import Product
 from schemas import ProductCreate, ProductOut
-from dependencies import JWTBearer, role_required
+from dependencies import role_required, revocation
+from pagination import keyset_page, out_columns, fetch_rows, encode_page, json_page, stream_ndjson
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from cache import product_cache, product_list_cache, cache_enabled, invalidate_product, cache_stats
+from bulk import iter_lines, import_products, export_products_csv
+from search import build_search_query
+from token_cache import token_cache
+from common.metrics import setup_metrics, register_stats
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="Product Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await revocation.start()
+    yield
+    await revocation.stop()
+
+app = FastAPI(title="Product Service", lifespan=lifespan)
+setup_metrics(app, "product", database)
+register_stats("token_cache", token_cache.stats)
+register_stats("product_cache", cache_stats)
+register_stats("revocation", revocation.stats)
+
+PRODUCT_COLUMNS = out_columns(Product, ProductOut)
 
 @app.get("/")
 def root():
     return {"service": "product"}
 
 @app.get("/products", response_model=list[ProductOut])
-async def list_products(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Product))
-    return result.scalars().all()
+async def list_products(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[int] = Query(None, description="id последнего товара предыдущей страницы (X-Next-Cursor)"),
+    stream: bool = Query(False, description="отдать все товары потоком NDJSON"),
+    use_cache: bool = Depends(cache_enabled),
+    db: AsyncSession = Depends(get_db),
+):
+    if stream:
+        query = select(*PRODUCT_COLUMNS).order_by(Product.id)
+        if after is not None:
+            query = query.where(Product.id > after)
+        return StreamingResponse(stream_ndjson(query), media_type="application/x-ndjson")
+    key = (after, limit)
+    # в кеше лежит уже закодированная страница: попадание не тратит время на сериализацию
+    page = product_list_cache.get(key) if use_cache else None
+    if page is None:
+        generation = product_list_cache.generation
+        rows = await fetch_rows(db, keyset_page(select(*PRODUCT_COLUMNS), Product.id, after, limit))
+        page = encode_page(rows, limit)
+        # выключенный кеш и no-cache в запрос не наполняют его
+        if use_cache:
+            product_list_cache.put(key, page, generation)
+            response.headers["X-Cache"] = "MISS"
+    else:
+        response.headers["X-Cache"] = "HIT"
+    return json_page(request, response, page, limit)
 
 @app.post("/products", response_model=ProductOut, dependencies=[Depends(role_required("admin"))])
 async def create_product(product: ProductCreate, db: AsyncSession = Depends(get_db)):
     db_product = Product(**product.dict())
     db.add(db_product)
     await db.commit()
+    invalidate_product()
     await db.refresh(db_product)
     return db_product
 
+@app.post("/products/bulk", dependencies=[Depends(role_required("admin"))])
+async def bulk_import_products(request: Request, db: AsyncSession = Depends(get_db)):
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        fmt = "csv"
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        fmt = "ndjson"
+    else:
+        raise HTTPException(status_code=415, detail="Use text/csv or application/x-ndjson")
+    try:
+        return await import_products(db, iter_lines(request), fmt)
+    finally:
+        invalidate_product()
+
+@app.get("/products/export", dependencies=[Depends(role_required("admin"))])
+async def export_products():
+    return StreamingResponse(
+        export_products_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="products.csv"'},
+    )
+
+@app.get("/products/search", response_model=list[ProductOut])
+async def search_products(
+    q: Optional[str] = Query(None, min_length=1, max_length=200, description="текст для поиска по названию и описанию"),
+    fuzzy: bool = Query(False, description="нечёткий поиск по названию (pg_trgm), в т.ч. по началу слова"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Literal["relevance", "price_asc", "price_desc", "newest"] = "relevance",
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    offset: int = Query(0, ge=0, le=10000),
+    db: AsyncSession = Depends(get_db),
+):
+    query = build_search_query(q, fuzzy, min_price, max_price, sort, limit, offset)
+    result = await db.execute(query)
+    return result.scalars().all()
+
 @app.get("/products/{product_id}", response_model=ProductOut)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    response: Response,
+    use_cache: bool = Depends(cache_enabled),
+    db: AsyncSession = Depends(get_db),
+):
+    product = product_cache.get(product_id) if use_cache else None
+    if product is not None:
+        response.headers["X-Cache"] = "HIT"
+        return product
+    generation = product_cache.generation
     result = await db.execute(select(Product).where(Product.id == product_id))
-    product = result.scalars().first()
-    if not product:
+    db_product = result.scalars().first()
+    if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
+    product = ProductOut.model_validate(db_product, from_attributes=True)
+    if use_cache:
+        product_cache.put(product_id, product, generation)
+        response.headers["X-Cache"] = "MISS"
     return product
 
 @app.put("/products/{product_id}", response_model=ProductOut, dependencies=[Depends(role_required("admin"))])
@@ -42,6 +141,7 @@ async def update_product(product_id: int, product: ProductCreate, db: AsyncSessi
     for key, value in product.dict().items():
         setattr(db_product, key, value)
     await db.commit()
+    invalidate_product(product_id)
     await db.refresh(db_product)
     return db_product
 
@@ -53,4 +153,5 @@ async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Product not found")
     await db.delete(product)
     await db.commit()
+    invalidate_product(product_id)
     return {"detail": "Product deleted"}
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, Integer, String, Float, DateTime, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import declarative_base, deferred
 from sqlalchemy.sql import func
 
 Base = declarative_base()
@@ -11,3 +12,8 @@ class Product(Base):
     description = Column(String(1024), nullable=True)
     price = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # генерируется Postgres (миграция 0004), в выдачу не попадает — только для поиска
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))", persisted=True),
+    ))
@@ -0,0 +1,46 @@
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.future import select
+from models import Product
+
+SEARCH_CONFIG = "simple"
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def build_search_query(
+    q: Optional[str] = None,
+    fuzzy: bool = False,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: str = "relevance",
+    limit: int = 100,
+    offset: int = 0,
+):
+    query = select(Product)
+    rank = None
+    if q:
+        if fuzzy:
+            # оба условия обслуживает GIN-индекс pg_trgm по name (BitmapOr)
+            query = query.where(Product.name.op("%")(q) | Product.name.ilike(_escape_like(q) + "%", escape="\\"))
+            rank = func.similarity(Product.name, q)
+        else:
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+            query = query.where(Product.search_vector.op("@@")(ts_query))
+            rank = func.ts_rank_cd(Product.search_vector, ts_query)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+
+    if sort == "price_asc":
+        order = (Product.price.asc(), Product.id)
+    elif sort == "price_desc":
+        order = (Product.price.desc(), Product.id)
+    elif sort == "newest":
+        order = (Product.created_at.desc(), Product.id.desc())
+    elif rank is not None:
+        order = (rank.desc(), Product.id)
+    else:
+        order = (Product.id,)
+    return query.order_by(*order).limit(limit).offset(offset)
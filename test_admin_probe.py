@@ -0,0 +1,51 @@
+import asyncio
+
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import declarative_base
+
+from common.admin import AdminProbe
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True)
+    role = Column(String(20))
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeDB:
+    def __init__(self, has_admin):
+        self.has_admin = has_admin
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return FakeResult(self.has_admin)
+
+
+def test_probe_queries_until_an_admin_is_known():
+    probe = AdminProbe(User)
+    db = FakeDB(has_admin=False)
+    assert not asyncio.run(probe.exists(db))
+    assert not asyncio.run(probe.exists(db))
+    assert db.queries == 2
+    probe.mark("user")
+    assert not probe.known
+    probe.mark("admin")
+    assert asyncio.run(probe.exists(db)) and db.queries == 2
+
+
+def test_probe_remembers_admin_found_in_db():
+    probe = AdminProbe(User)
+    db = FakeDB(has_admin=True)
+    assert asyncio.run(probe.exists(db)) and asyncio.run(probe.exists(db))
+    assert db.queries == 1
@@ -0,0 +1,30 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+spec = importlib.util.spec_from_file_location("fp_experiment", os.path.join(os.path.dirname(__file__), "4.py"))
+fp_experiment = importlib.util.module_from_spec(spec)
+# пул процессов передаёт функции по имени модуля
+sys.modules["fp_experiment"] = fp_experiment
+spec.loader.exec_module(fp_experiment)
+
+
+def test_points_are_deterministic_per_seed():
+    a = fp_experiment.run_experiment(10, 4, 0.6, n_queries=5000, seed=1)
+    b = fp_experiment.run_experiment(10, 4, 0.6, n_queries=5000, seed=1)
+    assert a == b
+    assert 0 < a < 0.1
+
+
+def test_grid_reuses_cached_points(tmp_path, capsys):
+    cache = str(tmp_path / "fp.parquet")
+    first = fp_experiment.run_grid([8], [4, 8], [0.5], n_queries=2000, cache=cache, workers=1)
+    extended = fp_experiment.run_grid([8], [4, 8], [0.5, 0.8], n_queries=2000, cache=cache, workers=1)
+    out = capsys.readouterr().out
+    assert "посчитано точек: 2, из кеша: 2" in out
+    assert len(first) == 2 and len(extended) == 4
+    assert extended[extended["load_factor"] == 0.5]["false_positive_rate"].tolist() == first["false_positive_rate"].tolist()
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+import orjson
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from conftest import import_service
+
+models, schemas, pagination = import_service("product_service", "models", "schemas", "pagination")
+
+
+def rows(n):
+    created = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    return [
+        {"name": f"p{i}", "description": None if i % 2 else "d", "price": i + 0.5, "id": i, "created_at": created}
+        for i in range(1, n + 1)
+    ]
+
+
+def request(query=b""):
+    return Request({"type": "http", "method": "GET", "scheme": "http", "server": ("test", 80),
+                    "path": "/products", "query_string": query, "headers": []})
+
+
+def test_columns_follow_output_schema():
+    columns = pagination.out_columns(models.Product, schemas.ProductOut)
+    assert [c.key for c in columns] == list(schemas.ProductOut.model_fields)
+    app_models, app_schemas, app_pagination = import_service("app", "models", "schemas", "pagination")
+    keys = [c.key for c in app_pagination.out_columns(app_models.User, app_schemas.UserOut)]
+    assert "password_hash" not in keys
+
+
+def test_encoded_rows_match_pydantic_output():
+    data = rows(3)
+    body, cursor = pagination.encode_page(data, limit=10)
+    assert cursor is None
+    adapter = TypeAdapter(list[schemas.ProductOut])
+    # тот же ответ, что дала бы валидация через ProductOut, с точностью до записи UTC в дате
+    assert adapter.validate_json(body) == adapter.validate_python(data)
+    assert orjson.loads(body)[0]["created_at"] == "2024-05-01T12:30:00+00:00"
+
+
+def test_json_page_keeps_headers_and_sets_cursor():
+    dependency_response = Response()
+    dependency_response.headers["X-Cache"] = "MISS"
+    page = pagination.encode_page(rows(5), limit=5)
+    out = pagination.json_page(request(b"limit=5"), dependency_response, page, 5)
+    assert out.media_type == "application/json"
+    assert out.headers["X-Cache"] == "MISS"
+    assert out.headers["X-Next-Cursor"] == "5"
+    assert "after=5" in out.headers["Link"]
+
+    short = pagination.json_page(request(), Response(), pagination.encode_page(rows(2), limit=5), 5)
+    assert "X-Next-Cursor" not in short.headers
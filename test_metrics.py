@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from conftest import import_service
+from common import metrics
+
+product_main = import_service("product_service", "main")
+token_cache_module = import_service("user_service", "token_cache")
+
+
+def call(app, *requests):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.request(method, path) for method, path in requests]
+    return asyncio.run(scenario())
+
+
+def test_metrics_endpoint_reports_route_templates_and_stats():
+    # без токена запрос отклоняется до БД, но маршрут уже известен
+    resp, missing, page = call(
+        product_main.app, ("DELETE", "/products/42"), ("GET", "/no/such/path"), ("GET", "/metrics")
+    )
+    assert resp.status_code == 401
+    assert missing.status_code == 404
+    body = page.text
+    assert 'route="/products/{product_id}"' in body
+    assert 'route="<unmatched>"' in body
+    assert "/products/42" not in body
+    assert "product_cache_product_hits" in body
+    assert "db_pool_checkout_wait_seconds_total" in body
+
+
+def test_jwt_decode_is_timed():
+    before = metrics.OPERATION_LATENCY.labels("jwt_decode")._sum.get()
+    with pytest.raises(Exception):
+        token_cache_module.decode_token("not-a-jwt")
+    assert metrics.OPERATION_LATENCY.labels("jwt_decode")._sum.get() > before
+
+
+def test_queries_are_counted_per_request():
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    metrics.instrument_engine(engine, "test")
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware, service="test")
+
+    @app.get("/three")
+    async def three():
+        async with engine.connect() as conn:
+            for _ in range(3):
+                await conn.execute(text("SELECT 1"))
+        return {}
+
+    call(app, ("GET", "/three"))
+    queries = metrics.DB_QUERIES_PER_REQUEST.labels("test", "/three")
+    assert queries._sum.get() == 3
+    asyncio.run(engine.dispose())
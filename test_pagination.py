@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+from conftest import import_service
+
+cache, database, pagination, main = import_service("product_service", "cache", "database", "pagination", "main")
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    # product_service поверх SQLite: GET /products без авторизации, кеш выключен
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    monkeypatch.setattr(cache, "PRODUCT_CACHE_ENABLED", False)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/products.db")
+    session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, description TEXT, "
+                                    "price REAL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
+            for i in range(1, 251):
+                await conn.execute(text("INSERT INTO products (name, price) VALUES (:name, :price)"),
+                                   {"name": f"p{i}", "price": i})
+
+    async def get_db():
+        async with session() as db:
+            yield db
+
+    asyncio.run(setup())
+    main.app.dependency_overrides[database.get_db] = get_db
+    # stream_ndjson открывает собственную сессию
+    monkeypatch.setattr(pagination, "AsyncSessionLocal", session)
+
+    def get(path):
+        async def request():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as c:
+                return await c.get(path)
+        return asyncio.run(request())
+
+    yield get
+    main.app.dependency_overrides.clear()
+    asyncio.run(engine.dispose())
+
+
+def walk(get, path):
+    pages = []
+    while path:
+        r = get(path)
+        assert r.status_code == 200
+        pages.append([p["id"] for p in r.json()])
+        link = r.headers.get("Link")
+        path = link[1:link.index(">")].removeprefix("http://test") if link else None
+    return pages
+
+
+def test_default_page_size_and_short_last_page(client):
+    pages = walk(client, "/products")
+    assert [len(p) for p in pages] == [100, 100, 50]
+    assert sum(pages, []) == list(range(1, 251))
+
+
+def test_after_starts_strictly_after_cursor(client):
+    r = client("/products?limit=3&after=10")
+    assert [p["id"] for p in r.json()] == [11, 12, 13]
+    assert r.headers["X-Next-Cursor"] == "13"
+    last = client("/products?limit=10&after=245")
+    assert [p["id"] for p in last.json()] == [246, 247, 248, 249, 250]
+    assert "X-Next-Cursor" not in last.headers and "Link" not in last.headers
+
+
+def test_full_last_page_is_followed_by_an_empty_one(client):
+    assert walk(client, "/products?limit=125") == [list(range(1, 126)), list(range(126, 251)), []]
+
+
+def test_stream_returns_every_row_after_cursor(client):
+    r = client("/products?stream=true&after=240")
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [orjson.loads(line) for line in r.content.splitlines()]
+    assert [row["id"] for row in rows] == list(range(241, 251))
+    assert set(rows[0]) == set(main.ProductOut.model_fields)
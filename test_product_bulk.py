@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import import_service
+
+bulk = import_service("product_service", "bulk")
+
+HEADER = ["name", "description", "price"]
+
+
+def test_parse_csv_line_maps_header_and_empty_values():
+    assert bulk._parse_line(b'"Desk, oak",,12.5', "csv", HEADER) == {"name": "Desk, oak", "description": None, "price": "12.5"}
+    with pytest.raises(ValueError):
+        bulk._parse_line(b"Desk,12.5", "csv", HEADER)
+
+
+def test_parse_ndjson_line():
+    assert bulk._parse_line(b'{"name": "Lamp", "price": 3}', "ndjson", None) == {"name": "Lamp", "price": 3}
+    with pytest.raises(ValueError):
+        bulk._parse_line(b'{"name": ', "ndjson", None)
+
+
+async def lines(*items):
+    for item in items:
+        yield item
+
+
+def run_import(monkeypatch, body, fmt, chunk_size):
+    copied = []
+
+    async def copy_chunk(db, records):
+        copied.append(records)
+
+    # COPY нужен настоящий asyncpg; здесь проверяется только разбор и отчёт по чанкам
+    monkeypatch.setattr(bulk, "_copy_chunk", copy_chunk)
+    monkeypatch.setattr(bulk, "BULK_CHUNK_SIZE", chunk_size)
+    report = asyncio.run(bulk.import_products(None, lines(*body), fmt))
+    return report, copied
+
+
+def test_bad_line_is_reported_in_its_chunk(monkeypatch):
+    body = [
+        b"\xef\xbb\xbfname,description,price",
+        b"Chair,,10",
+        b"Table,round,not-a-price",
+        b"",
+        b"Shelf,,7.5",
+        b"Stool,,2",
+    ]
+    report, copied = run_import(monkeypatch, body, "csv", chunk_size=2)
+    assert (report["inserted"], report["rejected"]) == (3, 1)
+    first, second = report["chunks"]
+    assert first["inserted"] == 1 and first["rejected"] == 1
+    assert [e["line"] for e in first["errors"]] == [3]
+    assert second == {"chunk": 2, "rows": 2, "inserted": 2, "rejected": 0, "errors": []}
+    assert copied == [[("Chair", None, 10.0)], [("Shelf", None, 7.5), ("Stool", None, 2.0)]]
+
+
+def test_chunk_without_valid_rows_skips_copy(monkeypatch):
+    body = [json.dumps({"name": "Lamp", "price": 1}).encode(), b"{broken", b'{"price": 5}']
+    report, copied = run_import(monkeypatch, body, "ndjson", chunk_size=1)
+    assert [c["inserted"] for c in report["chunks"]] == [1, 0, 0]
+    assert [e["line"] for c in report["chunks"] for e in c["errors"]] == [2, 3]
+    assert copied == [[("Lamp", None, 1.0)]]
+
+
+def test_errors_per_chunk_are_capped(monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_MAX_ERRORS_PER_CHUNK", 2)
+    report, copied = run_import(monkeypatch, [b"{bad"] * 5, "ndjson", chunk_size=10)
+    assert report["rejected"] == 5 and len(report["chunks"][0]["errors"]) == 2
+    assert copied == []
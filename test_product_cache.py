@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from conftest import import_service
+
+cache, database, main = import_service("product_service", "cache", "database", "main")
+
+
+def test_put_after_invalidation_is_dropped():
+    c = cache.TTLCache(10, ttl=60)
+    generation = c.generation          # начали читать из БД
+    c.invalidate(1)                    # параллельно товар изменили
+    c.put(1, "stale", generation)      # устаревшее значение не должно попасть в кеш
+    assert c.get(1) is None
+    c.put(1, "fresh", c.generation)
+    assert c.get(1) == "fresh"
+
+
+def test_entries_expire_after_ttl():
+    c = cache.TTLCache(10, ttl=0.01)
+    c.put("k", "v", c.generation)
+    time.sleep(0.02)
+    assert c.get("k") is None
+    assert c.stats()["misses"] == 1
+
+
+def test_lru_eviction_and_hit_ratio():
+    c = cache.TTLCache(2, ttl=60)
+    for key in ("a", "b"):
+        c.put(key, key, c.generation)
+    c.get("a")
+    c.put("c", "c", c.generation)
+    assert c.get("b") is None
+    assert c.get("a") == "a"
+    stats = c.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+
+def get_pages(monkeypatch, tmp_path, enabled, *requests):
+    # product_service поверх SQLite: проверяется только, что попадает в кеш процесса
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    monkeypatch.setattr(cache, "PRODUCT_CACHE_ENABLED", enabled)
+    for c in (cache.product_cache, cache.product_list_cache):
+        c.clear()
+
+    async def scenario():
+        path = tmp_path / f"products{len(list(tmp_path.iterdir()))}.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, description TEXT, "
+                                    "price REAL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
+            await conn.execute(text("INSERT INTO products (name, price) VALUES ('a', 1), ('b', 2)"))
+        session = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def get_db():
+            async with session() as db:
+                yield db
+
+        main.app.dependency_overrides[database.get_db] = get_db
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [await client.get(path, headers=headers) for path, headers in requests]
+        finally:
+            main.app.dependency_overrides.clear()
+            await engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def test_disabled_or_bypassed_cache_is_not_filled(monkeypatch, tmp_path):
+    no_cache = {"Cache-Control": "no-cache"}
+    responses = get_pages(monkeypatch, tmp_path, False, ("/products", {}), ("/products/1", {}))
+    assert all(r.status_code == 200 and "X-Cache" not in r.headers for r in responses)
+    assert len(cache.product_list_cache._entries) == len(cache.product_cache._entries) == 0
+
+    responses = get_pages(monkeypatch, tmp_path, True, ("/products", no_cache), ("/products/1", no_cache))
+    assert [r.headers["X-Cache"] for r in responses] == ["BYPASS", "BYPASS"]
+    assert len(cache.product_list_cache._entries) == len(cache.product_cache._entries) == 0
+
+    responses = get_pages(monkeypatch, tmp_path, True, ("/products", {}), ("/products", {}))
+    assert [r.headers["X-Cache"] for r in responses] == ["MISS", "HIT"]
+    assert [p["name"] for p in responses[1].json()] == ["a", "b"]
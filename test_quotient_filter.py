@@ -0,0 +1,149 @@
+import random
+
+import numpy as np
+import pytest
+
+from common.quotient_filter import QuotientFilter, PackedQuotientFilter
+
+
+@pytest.mark.parametrize("q,r", [(4, 2), (6, 4), (8, 8), (10, 12)])
+def test_no_false_negatives_up_to_full_table(q, r):
+    rng = random.Random(q * 100 + r)
+    qf = QuotientFilter(q, r)
+    items = rng.sample(range(10**9), qf.m)
+    added = []
+    for x in items:
+        try:
+            qf.add(x)
+        except ValueError:
+            break
+        added.append(x)
+    assert len(added) >= qf.m - 1
+    assert all(x in qf for x in added)
+    assert len(qf) <= qf.m
+
+
+def test_false_positive_rate_matches_remainder_bits():
+    rng = random.Random(7)
+    qf = QuotientFilter(12, 8)
+    for x in rng.sample(range(10**9), int(0.75 * qf.m)):
+        qf.add(x)
+    queries = range(10**9, 10**9 + 20000)
+    rate = sum(x in qf for x in queries) / len(queries)
+    # ожидаемо около α / 2^r ≈ 0.003
+    assert rate < 0.01
+
+
+@pytest.mark.parametrize("q,r", [(3, 4), (8, 6), (12, 10)])
+def test_bulk_build_matches_one_by_one_inserts(q, r):
+    rng = np.random.default_rng(q + r)
+    keys = rng.integers(0, 2**62, int(0.9 * (1 << q)))
+    bulk = QuotientFilter(q, r)
+    bulk.add_many(keys)
+    single = QuotientFilter(q, r)
+    for x in keys.tolist():
+        single.add(x)
+    # одинаковый набор отпечатков даёт одну и ту же таблицу
+    assert np.array_equal(bulk.remainders, single.remainders)
+    assert np.array_equal(bulk.is_continuation, single.is_continuation)
+    assert np.array_equal(bulk.is_shifted, single.is_shifted)
+    assert bulk.contains_many(keys).all()
+    queries = rng.integers(0, 2**62, 1000)
+    assert np.array_equal(bulk.contains_many(queries), [x in bulk for x in queries.tolist()])
+
+
+def test_small_batches_go_into_existing_table():
+    qf = QuotientFilter(10, 8)
+    first = np.arange(600)
+    qf.add_many(first)
+    qf.add_many(np.arange(600, 610))
+    assert qf.contains_many(np.arange(610)).all()
+    assert qf.rank(0, qf.m) == np.count_nonzero(qf.is_occupied)
+
+
+@pytest.mark.parametrize("q,r", [(4, 2), (10, 5), (12, 29)])
+def test_packed_file_roundtrip_through_memmap(q, r, tmp_path):
+    rng = np.random.default_rng(r)
+    keys = rng.integers(0, 2**62, int(0.85 * (1 << q)))
+    qf = QuotientFilter(q, r)
+    qf.add_many(keys)
+    path = tmp_path / "filter.qf"
+    qf.save(path)
+
+    packed = PackedQuotientFilter.load(path)
+    assert isinstance(packed.words, np.memmap)
+    # r+3 бит на слот и одно слово запаса
+    assert packed.nbytes == 8 * (-(-qf.m * (r + 3) // 64) + 1)
+    queries = rng.integers(0, 2**62, 2000)
+    assert packed.contains_many(keys).all()
+    assert np.array_equal(packed.contains_many(queries), qf.contains_many(queries))
+
+    restored = QuotientFilter.load(path)
+    assert np.array_equal(restored.fingerprints(), qf.fingerprints())
+    assert np.array_equal(restored.occupied_blocks, qf.occupied_blocks)
+
+
+def test_auto_resize_keeps_every_key_without_the_originals():
+    rng = np.random.default_rng(3)
+    keys = rng.integers(0, 2**62, 3000)
+    qf = QuotientFilter(6, 20, max_load=0.75)
+    for x in keys.tolist():
+        qf.add(x)
+    assert qf.load_factor <= 0.75
+    assert qf.q + qf.r == 26
+    assert qf.contains_many(keys).all()
+
+    before = qf.fingerprints()
+    qf.resize(qf.q + 2)
+    assert np.array_equal(qf.fingerprints(), before)
+    assert all(x in qf for x in keys[:300].tolist())
+
+
+def test_merge_of_shards_equals_single_filter():
+    rng = np.random.default_rng(4)
+    keys = rng.integers(0, 2**62, 4000)
+    shards = [QuotientFilter(8, 16, max_load=0.8) for _ in range(4)]
+    for i, shard in enumerate(shards):
+        shard.add_many(keys[i::4])
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+    single = QuotientFilter(8, 16, max_load=0.8)
+    single.add_many(keys)
+    assert np.array_equal(merged.fingerprints(), single.fingerprints())
+    assert merged.contains_many(keys).all()
+    with pytest.raises(ValueError):
+        merged.merge(QuotientFilter(8, 8))
+
+
+def test_fixed_size_filter_reports_full_instead_of_looping():
+    qf = QuotientFilter(3, 8)
+    with pytest.raises(ValueError):
+        for x in range(100):
+            qf.add(x)
+    assert len(qf) == qf.m - 1
+    assert all(x in qf for x in range(len(qf)))
+
+
+def test_failed_merge_or_bulk_insert_keeps_the_filter():
+    qf = QuotientFilter(4, 8)
+    qf.add_many(np.arange(10))
+    before = qf.fingerprints().copy()
+    shard = QuotientFilter(5, 7)
+    shard.add_many(np.arange(100, 131))
+    with pytest.raises(ValueError):
+        qf.merge(shard)
+    with pytest.raises(ValueError):
+        qf.add_many(np.arange(1000, 1100))
+    with pytest.raises(ValueError):
+        qf.resize(3)
+    assert (qf.q, qf.r, len(qf)) == (4, 8, 10)
+    assert np.array_equal(qf.fingerprints(), before)
+    assert qf.contains_many(np.arange(10)).all()
+
+    grown = QuotientFilter(4, 2, max_load=0.9)
+    grown.add_many(np.arange(20))
+    before = grown.fingerprints().copy(), grown.q
+    with pytest.raises(ValueError):
+        grown.add_many(np.arange(200))
+    assert np.array_equal(grown.fingerprints(), before[0]) and grown.q == before[1]
@@ -0,0 +1,82 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings, strategies as st
+
+from common.quotient_filter import QuotientFilter, hash64
+
+# маленькая таблица и короткий остаток: много общих отпечатков, длинные кластеры и заворот через конец
+Q, R = 4, 3
+operations = st.lists(st.tuples(st.sampled_from(["add", "remove"]), st.integers(0, 200)), max_size=120)
+
+
+def fingerprint(x, p=Q + R):
+    return hash64(x) & ((1 << p) - 1)
+
+
+def assert_canonical(qf):
+    # раскладка однозначно задаётся набором отпечатков: после любых удалений таблица
+    # должна совпадать с собранной заново из тех же отпечатков
+    fp, counts = qf.fingerprint_counts()
+    fresh = QuotientFilter(qf.q, qf.r, counting=qf.counting)
+    fresh._rebuild(fp, counts if qf.counting else None)
+    assert np.array_equal(qf.remainders, fresh.remainders)
+    assert np.array_equal(qf.is_occupied, fresh.is_occupied)
+    assert np.array_equal(qf.is_continuation, fresh.is_continuation)
+    assert np.array_equal(qf.is_shifted, fresh.is_shifted)
+    assert np.array_equal(qf.occupied_blocks, fresh.occupied_blocks)
+
+
+def apply(qf, model, ops, counting):
+    for op, x in ops:
+        f = fingerprint(x, qf.q + qf.r)
+        if op == "add":
+            try:
+                qf.add(x)
+            except ValueError:
+                # полная таблица: новый отпечаток не влез, состояние не изменилось
+                assert f not in model and len(model) == qf.m - 1
+                continue
+            model[f] = model[f] + 1 if counting else 1
+        else:
+            assert qf.remove(x) == (f in model)
+            if f in model:
+                model[f] -= 1
+                if not counting or model[f] == 0:
+                    del model[f]
+
+
+@settings(max_examples=300, deadline=None)
+@given(ops=operations, counting=st.booleans())
+def test_add_remove_matches_counter(ops, counting):
+    qf = QuotientFilter(Q, R, counting=counting)
+    model = Counter()
+    apply(qf, model, ops, counting)
+
+    assert len(qf) == len(model)
+    assert qf.fingerprints().tolist() == sorted(model)
+    for x in range(201):
+        assert (x in qf) == (fingerprint(x) in model)
+        if counting:
+            assert qf.multiplicity(x) == model[fingerprint(x)]
+    assert_canonical(qf)
+
+
+@settings(max_examples=100, deadline=None)
+@given(ops=operations)
+def test_counting_survives_resize_and_bulk_adds(ops):
+    # 12-битные отпечатки: таблице есть куда расти, пока остаток не сократится до 1 бита
+    qf = QuotientFilter(2, 10, max_load=0.75, counting=True)
+    model = Counter()
+    apply(qf, model, ops, counting=True)
+    keys = np.arange(150, 170)
+    qf.add_many(keys)
+    model.update(fingerprint(x, 12) for x in keys.tolist())
+
+    fp, counts = qf.fingerprint_counts()
+    assert dict(zip(fp.tolist(), counts.tolist())) == dict(model)
+    assert qf.load_factor <= 0.75
+    assert_canonical(qf)
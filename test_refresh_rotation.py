@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import requests
+
+BASE_AUTH = "https://localhost:8000"
+CONCURRENT_REFRESHES = 10
+
+
+@pytest.fixture(scope="module")
+def tokens():
+    suffix = str(int(time.time() * 1000))
+    user = {"username": f"rotate_{suffix}", "email": f"rotate_{suffix}@mail.com", "password": "password1"}
+    r = requests.post(f"{BASE_AUTH}/register", json=user)
+    assert r.status_code == 200
+    r = requests.post(f"{BASE_AUTH}/login", json={"username": user["username"], "password": user["password"]})
+    assert r.status_code == 200
+    return r.json()
+
+
+# Один и тот же refresh-токен, отправленный параллельно, должен сработать ровно один раз
+def test_concurrent_refresh_with_same_token(tokens):
+    async def refresh_all():
+        async with httpx.AsyncClient(base_url=BASE_AUTH, verify=False) as client:
+            return await asyncio.gather(*(
+                client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+                for _ in range(CONCURRENT_REFRESHES)
+            ))
+
+    responses = asyncio.run(refresh_all())
+    statuses = sorted(r.status_code for r in responses)
+    print(f"\n[TEST] Статусы параллельных refresh: {statuses}")
+    assert statuses.count(200) == 1
+    assert statuses.count(401) == CONCURRENT_REFRESHES - 1
+
+    new_refresh = next(r.json()["refresh_token"] for r in responses if r.status_code == 200)
+    r = requests.post(f"{BASE_AUTH}/token/refresh", json={"refresh_token": new_refresh})
+    assert r.status_code == 200
+    r = requests.post(f"{BASE_AUTH}/token/refresh", json={"refresh_token": new_refresh})
+    assert r.status_code == 401
@@ -0,0 +1,24 @@
+import asyncio
+
+from conftest import import_service
+
+retention = import_service("auth_service", "retention")
+
+
+def test_zero_batch_size_disables_purge(monkeypatch):
+    calls = []
+
+    async def purge_batch(db, batch_size):
+        calls.append(batch_size)
+        return 0
+
+    monkeypatch.setattr(retention, "REFRESH_TOKEN_PURGE_BATCH_SIZE", 0)
+
+    async def scenario():
+        retention.start_retention()
+        started = retention._task
+        return started, await retention._purge(purge_batch, 0)
+
+    started, purged = asyncio.run(scenario())
+    assert started is None
+    assert purged == 0 and calls == []
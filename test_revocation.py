@@ -0,0 +1,65 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from common.revocation import RevocationFilter, RevocationList, revoked_tokens
+
+
+def test_filter_finds_revoked_jti_in_its_exp_bucket():
+    f = RevocationFilter(q=8, r=16, bucket_seconds=60)
+    now = int(time.time())
+    jtis = [str(uuid.uuid4()) for _ in range(100)]
+    for i, jti in enumerate(jtis):
+        f.add(jti, now + i)
+    assert all(f.might_contain(jti, now + i) for i, jti in enumerate(jtis))
+    others = sum(f.might_contain(str(uuid.uuid4()), now + 30) for _ in range(2000))
+    assert others < 20
+
+
+def test_expired_buckets_are_dropped():
+    f = RevocationFilter(q=8, r=16, bucket_seconds=60)
+    f.add("old", 1000)
+    f.add("fresh", 5000)
+    f.expire(now=2000)
+    assert not f.might_contain("old", 1000)
+    assert f.might_contain("fresh", 5000)
+    assert len(f) == 1
+
+
+def test_saturated_bucket_answers_maybe():
+    f = RevocationFilter(q=4, r=8, bucket_seconds=60)
+    for i in range(100):
+        f.add(f"jti-{i}", 600)
+    assert 10 in f.saturated
+    assert f.might_contain("never-added", 600)
+
+
+def test_only_filter_hits_reach_the_database():
+    pytest.importorskip("aiosqlite")
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(revoked_tokens.metadata.create_all)
+            await conn.execute(revoked_tokens.insert().values(
+                id=1, jti="revoked-jti", expires_at=datetime.fromtimestamp(time.time() + 600, timezone.utc),
+            ))
+        revocation = RevocationList(sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False))
+        await revocation.sync()
+        exp = int(time.time()) + 600
+        revoked = await revocation.is_revoked({"jti": "revoked-jti", "exp": exp})
+        fresh = [await revocation.is_revoked({"jti": str(uuid.uuid4()), "exp": exp}) for _ in range(200)]
+        await engine.dispose()
+        return revoked, fresh, revocation.stats()
+
+    revoked, fresh, stats = asyncio.run(scenario())
+    assert revoked
+    assert not any(fresh)
+    assert stats["checks"] == 201
+    assert stats["revoked_hits"] == 1
+    assert stats["filter_hits"] < 5
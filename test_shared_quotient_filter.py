@@ -0,0 +1,65 @@
+import multiprocessing
+import pickle
+
+import numpy as np
+import pytest
+
+from common.shared_quotient_filter import SharedQuotientFilter
+
+
+def read_while_writing(qf, stable, absent, ready, stop, results):
+    # qf пришёл через pickle (spawn): это читатель, подключённый к тому же сегменту
+    missing = false_hits = rounds = 0
+    start = qf.generation
+    ready.set()
+    while not stop.is_set() or rounds < 3:
+        missing += sum(x not in qf for x in stable)
+        missing += int((~qf.contains_many(stable)).sum())
+        false_hits += sum(x in qf for x in absent)
+        rounds += 1
+    results.put((missing, false_hits, rounds, qf.generation - start))
+    qf.close()
+
+
+def test_readers_see_consistent_table_during_writes():
+    rng = np.random.default_rng(5)
+    keys = rng.choice(2**40, 6000, replace=False)
+    stable, churn, absent = keys[:2000], keys[2000:5000], keys[5000:].tolist()
+    ctx = multiprocessing.get_context("spawn")
+    with SharedQuotientFilter(13, 20) as qf:
+        qf.add_many(stable)
+        ready, stop, results = ctx.Event(), ctx.Event(), ctx.Queue()
+        reader = ctx.Process(target=read_while_writing, args=(qf, stable, absent, ready, stop, results))
+        reader.start()
+        try:
+            assert ready.wait(timeout=60)
+            # писатель гоняет вставки и удаления, от которых сдвигаются кластеры со стабильными ключами
+            for _ in range(3):
+                for x in churn.tolist():
+                    qf.add(x)
+                for x in churn.tolist():
+                    qf.remove(x)
+        finally:
+            stop.set()
+        missing, false_hits, rounds, generations = results.get(timeout=60)
+        reader.join(timeout=10)
+
+        assert missing == 0
+        # при r=20 ложные срабатывания ~α/2^20: что-то заметное означало бы чтение рваного состояния
+        assert false_hits <= rounds * len(absent) * 1e-3
+        assert generations > 0
+        assert len(qf) == len(stable)
+
+
+def test_only_the_creator_writes():
+    with SharedQuotientFilter(6, 8, counting=True) as qf:
+        qf.add(1)
+        qf.add(1)
+        reader = pickle.loads(pickle.dumps(qf))
+        assert not reader.writer and reader.name == qf.name
+        assert 1 in reader and reader.multiplicity(1) == 2
+        with pytest.raises(ValueError):
+            reader.add(2)
+        with pytest.raises(ValueError):
+            qf.resize(7)
+        reader.close()
@@ -0,0 +1,56 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from conftest import import_service
+
+config, token_cache_module = import_service("user_service", "config", "token_cache")
+SECRET_KEY, ALGORITHM = config.SECRET_KEY, config.ALGORITHM
+TokenCache = token_cache_module.TokenCache
+decode_token = token_cache_module.decode_token
+token_cache = token_cache_module.token_cache
+
+
+def make_token(exp_delta=60, **claims):
+    payload = {"sub": "1", "role": "user", "exp": int(time.time()) + exp_delta, **claims}
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def test_decode_token_hits_cache_on_reuse():
+    token_cache.clear()
+    token = make_token()
+    before = token_cache.stats()
+    first = decode_token(token)
+    second = decode_token(token)
+    stats = token_cache.stats()
+    assert first == second
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+
+def test_invalid_token_is_not_cached():
+    token_cache.clear()
+    with pytest.raises(HTTPException) as exc:
+        decode_token(make_token() + "x")
+    assert exc.value.status_code == 401
+    assert token_cache.stats()["size"] == 0
+
+
+def test_entry_expires_with_token():
+    cache = TokenCache(10)
+    cache.put(b"k", {"exp": time.time() - 1})
+    assert cache.get(b"k") is None
+
+
+def test_lru_is_bounded():
+    cache = TokenCache(2)
+    exp = time.time() + 60
+    cache.put(b"a", {"exp": exp})
+    cache.put(b"b", {"exp": exp})
+    cache.get(b"a")
+    cache.put(b"c", {"exp": exp})
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") is not None
+    assert cache.stats()["size"] == 2
@@ -1,7 +1,19 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import httpx
 import pytest
 import requests
 from fastapi.testclient import TestClient
-from auth_service.main import app
+
+from conftest import import_service
+
+vk_oauth, main = import_service("auth_service", "vk_oauth", "main")
+app = main.app
 
 
 BASE_AUTH = "http://localhost:8000"
@@ -27,27 +39,65 @@ def test_vk_callback_invalid_code():
     assert resp.status_code == 400 or resp.status_code == 500
     print("[VK TEST] --- OK ---")
 
+VK_STUB_DELAY = 1.0
+
+class VKStubHandler(BaseHTTPRequestHandler):
+    """Локальная заглушка VK: code=SLOW отвечает с задержкой, code=FLAKY сначала отдаёт 503."""
+    flaky_calls = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        code = params.get("code", [""])[0]
+        if url.path == "/access_token":
+            if code == "SLOW":
+                time.sleep(VK_STUB_DELAY)
+            if code == "FLAKY":
+                VKStubHandler.flaky_calls += 1
+                if VKStubHandler.flaky_calls == 1:
+                    return self._reply(503, {"error": "temporarily unavailable"})
+            if code == "INVALID_CODE":
+                return self._reply(401, {"error": "invalid_grant"})
+            return self._reply(200, {
+                "access_token": "vk_access_token_123",
+                "user_id": "vk_user_999",
+                "email": "vkuser@example.com"
+            })
+        if url.path == "/method/users.get":
+            return self._reply(200, {"response": [{"first_name": "Ivan", "last_name": "Ivanov"}]})
+        self._reply(404, {})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def vk_stub(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), VKStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(vk_oauth, "VK_OAUTH_URL", base)
+    monkeypatch.setattr(vk_oauth, "VK_API_URL", base)
+    VKStubHandler.flaky_calls = 0
+    yield base
+    server.shutdown()
+
 @pytest.fixture
-def client():
-    return TestClient(app)
-
-# Мок-тест успешного VK OAuth (без реального VK)
-def test_vk_callback_success(client, requests_mock):
-    print("\n[VK TEST] --- Успешный сценарий VK OAuth (моки) ---")
-    print("[VK TEST] Мокаем запрос https://oauth.vk.com/access_token → access_token, user_id, email")
-    requests_mock.get(
-        "https://oauth.vk.com/access_token",
-        json={
-            "access_token": "vk_access_token_123",
-            "user_id": "vk_user_999",
-            "email": "vkuser@example.com"
-        }
-    )
-    print("[VK TEST] Мокаем запрос https://api.vk.com/method/users.get → имя и фамилия")
-    requests_mock.get(
-        "https://api.vk.com/method/users.get",
-        json={"response": [{"first_name": "Ivan", "last_name": "Ivanov"}]}
-    )
+def client(vk_stub):
+    with TestClient(app) as c:
+        yield c
+
+# Успешный сценарий VK OAuth против локальной заглушки VK
+def test_vk_callback_success(client):
+    print("\n[VK TEST] --- Успешный сценарий VK OAuth (заглушка VK) ---")
     print("[VK TEST] Запрос: GET /auth/vk/callback?code=TEST_CODE (через TestClient)")
     resp = client.get("/auth/vk/callback?code=TEST_CODE")
     print(f"[VK TEST] Статус: {resp.status_code}")
@@ -62,6 +112,39 @@ def test_vk_callback_success(client, requests_mock):
     assert data["vk_name"] == "Ivan Ivanov"
     print("[VK TEST] --- OK ---")
 
+# Временная ошибка VK повторяется клиентом с backoff
+def test_vk_client_retries_transient_errors(vk_stub):
+    async def scenario():
+        try:
+            return await vk_oauth.exchange_code_for_token("FLAKY")
+        finally:
+            await vk_oauth.stop_vk_client()
+    data = asyncio.run(scenario())
+    assert data["access_token"] == "vk_access_token_123"
+    assert VKStubHandler.flaky_calls == 2
+
+# Пока callback ждёт медленный VK, остальные запросы обслуживаются
+def test_slow_vk_callback_does_not_block_other_requests(vk_stub):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                slow = asyncio.create_task(ac.get("/auth/vk/callback?code=SLOW"))
+                await asyncio.sleep(0.1)
+                start = time.perf_counter()
+                resp = await ac.get("/")
+                elapsed = time.perf_counter() - start
+                pending = not slow.done()
+                await slow
+                return resp, elapsed, pending
+        finally:
+            await vk_oauth.stop_vk_client()
+    resp, elapsed, pending = asyncio.run(scenario())
+    print(f"[VK TEST] GET / во время медленного callback: {elapsed * 1000:.1f} ms")
+    assert resp.status_code == 200
+    assert pending
+    assert elapsed < VK_STUB_DELAY / 2
+
 
 # def test_vk_callback_real():
 #     code = :"0a65eeeb0af2c2b0a9"
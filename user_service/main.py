@@ -1,22 +1,43 @@
 from fastapi import FastAPI, Depends, HTTPException, Body
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from database import get_db
+from database import get_db, database
 from models import User
 from schemas import UserOut
-from dependencies import JWTBearer, role_required
-from sqlalchemy import select as sync_select
+from dependencies import jwt_bearer, role_required, revocation
+from sqlalchemy import select as sync_select, literal, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi import status
 from models import User
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import get_db
 from schemas import UserOut
-from dependencies import JWTBearer, role_required
+from dependencies import jwt_bearer, role_required
 from fastapi import FastAPI, Depends, HTTPException, Body
 from pydantic import BaseModel, EmailStr
+from typing import Optional
+from fastapi import Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pagination import keyset_page, out_columns, fetch_rows, encode_page, json_page, stream_ndjson
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from token_cache import token_cache
+from common.metrics import setup_metrics, register_stats
+from common.admin import AdminProbe
+from contextlib import asynccontextmanager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await revocation.start()
+    yield
+    await revocation.stop()
+
+app = FastAPI(title="User Service", lifespan=lifespan)
+setup_metrics(app, "user", database)
+register_stats("token_cache", token_cache.stats)
+register_stats("revocation", revocation.stats)
 
-app = FastAPI(title="User Service")
+admin_probe = AdminProbe(User)
 
 class RegisterRequest(BaseModel):
     username: str
@@ -25,23 +46,25 @@ class RegisterRequest(BaseModel):
 
 @app.post("/register", status_code=status.HTTP_200_OK)
 async def register_user(data: RegisterRequest, db: AsyncSession = Depends(get_db)):
-    # Проверяем, есть ли уже admin
-    result = await db.execute(select(User).where(User.role == "admin"))
-    admin_exists = result.scalars().first() is not None
-    # Проверяем, есть ли пользователь с таким username/email
-    result = await db.execute(select(User).where((User.username == data.username) | (User.email == data.email)))
-    if result.scalars().first():
-        raise HTTPException(status_code=400, detail="User already exists")
-    # Создаём пользователя
-    user = User(
-        username=data.username,
-        email=data.email,
-        role="user" if admin_exists else "admin"
-    )
+    role = "user" if await admin_probe.exists(db) else "admin"
+    # Одна команда: вставка, только если email свободен, ON CONFLICT DO NOTHING — если занят username.
     # Пароль не сохраняется (заглушка, т.к. обычно хешируется и хранится отдельно)
-    db.add(user)
+    stmt = (
+        pg_insert(User)
+        .from_select(
+            ["username", "email", "role"],
+            select(literal(data.username), literal(data.email), literal(role))
+            .where(~exists().where(User.email == data.email)),
+        )
+        .on_conflict_do_nothing()
+        .returning(User)
+    )
+    result = await db.execute(stmt)
+    user = result.scalars().first()
     await db.commit()
-    await db.refresh(user)
+    if user is None:
+        raise HTTPException(status_code=400, detail="User already exists")
+    admin_probe.mark(user.role)
     return {"id": user.id, "username": user.username, "email": user.email, "role": user.role}
 
 @app.get("/")
@@ -49,7 +72,7 @@ def root():
     return {"service": "user"}
 
 @app.get("/users/me", response_model=UserOut)
-async def get_me(payload=Depends(JWTBearer()), db: AsyncSession = Depends(get_db)):
+async def get_me(payload=Depends(jwt_bearer), db: AsyncSession = Depends(get_db)):
     user_id = int(payload["sub"])
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalars().first()
@@ -57,10 +80,25 @@ async def get_me(payload=Depends(JWTBearer()), db: AsyncSession = Depends(get_db
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+# колонки выдачи списка: ровно поля UserOut, хеш пароля и прочее в запрос не попадают
+USER_COLUMNS = out_columns(User, UserOut)
+
 @app.get("/users", response_model=list[UserOut], dependencies=[Depends(role_required("admin"))])
-async def get_users(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User))
-    return result.scalars().all()
+async def get_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[int] = Query(None, description="id последнего пользователя предыдущей страницы (X-Next-Cursor)"),
+    stream: bool = Query(False, description="отдать всех пользователей потоком NDJSON"),
+    db: AsyncSession = Depends(get_db),
+):
+    if stream:
+        query = select(*USER_COLUMNS).order_by(User.id)
+        if after is not None:
+            query = query.where(User.id > after)
+        return StreamingResponse(stream_ndjson(query), media_type="application/x-ndjson")
+    rows = await fetch_rows(db, keyset_page(select(*USER_COLUMNS), User.id, after, limit))
+    return json_page(request, response, encode_page(rows, limit), limit)
 
 @app.delete("/users/{user_id}", dependencies=[Depends(role_required("admin"))])
 async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
@@ -80,4 +118,5 @@ async def change_user_role(user_id: int, new_role: str = Body(...), db: AsyncSes
         raise HTTPException(status_code=404, detail="User not found")
     user.role = new_role
     await db.commit()
+    admin_probe.mark(new_role)
     return {"detail": f"Role updated to {new_role}"}